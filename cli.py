@@ -0,0 +1,402 @@
+import argparse
+import json
+import logging
+import sys
+import time
+
+from rustore.accounts import AccountRegistry
+from rustore.catalog import CATALOG_KINDS, CatalogMirror, CatalogSyncer
+from rustore.compare import compare_batch
+from rustore.config import get_settings
+from rustore.jobs import JobQueue, JobWorker
+from rustore.loadtest import LoadGenerator, format_report, format_second, scenario_from_dicts
+from rustore.methods import load_all, list_methods
+from rustore.profiling import profile_run
+from rustore.subscription_watcher import PollPolicy, SubscriptionWatcher, state_target, v4_target
+from rustore.validation import compile_validators, validate_batch
+
+
+def _parse_kv(items: list[str] | None) -> dict:
+    out = {}
+    for item in items or []:
+        if "=" not in item:
+            raise SystemExit(f"Ожидается name=value, получено: {item}")
+        k, v = item.split("=", 1)
+        out[k.strip()] = v.strip()
+    return out
+
+
+def _method(methods: dict, key: str):
+    m = methods.get(key)
+    if m is None:
+        raise SystemExit(f"метод '{key}' не найден в methods.yaml")
+    return m
+
+
+def _read_jobs_file(path: str) -> list[dict]:
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                jobs.append(json.loads(line))
+    return jobs
+
+
+def cmd_enqueue(args) -> int:
+    queue = JobQueue(args.queue, wal=args.wal)
+    if args.file:
+        jobs = _read_jobs_file(args.file)
+    else:
+        if not args.method:
+            raise SystemExit("Нужен --method или --file")
+        jobs = [{
+            "method": args.method,
+            "env": args.env,
+            "path": _parse_kv(args.path),
+            "query": _parse_kv(args.query),
+            "body": json.loads(args.body) if args.body else None,
+        }]
+    validators = compile_validators(list_methods(load_all("methods.yaml")))
+    bad = validate_batch(validators, jobs)
+    if bad:
+        for i, errs in sorted(bad.items()):
+            print(f"job #{i + 1}: " + "; ".join(errs), file=sys.stderr)
+        print(f"rejected: {len(bad)} of {len(jobs)} job(s) are invalid, nothing enqueued", file=sys.stderr)
+        return 2
+    for j in jobs:
+        j.setdefault("max_attempts", args.max_attempts)
+    ids = queue.enqueue_many(jobs)
+    print(f"enqueued {len(ids)} job(s)")
+    return 0
+
+
+def cmd_worker(args) -> int:
+    logger = logging.getLogger("rustore.worker")
+    registry = AccountRegistry(get_settings(), logger=logger)
+    methods = list_methods(load_all("methods.yaml"))
+    queue = JobQueue(args.queue, wal=args.wal)
+    worker = JobWorker(
+        queue,
+        registry,
+        methods,
+        concurrency=args.concurrency,
+        lease_seconds=args.lease,
+        logger=logger,
+    )
+    worker.run(exit_when_empty=args.once)
+    for st in registry.breakers.stats():
+        logger.info(
+            "[BREAKER] %s state=%s calls=%d failures=%d rejected=%d",
+            st.key, st.state, st.calls, st.failures, st.rejected,
+        )
+    if registry.hedger:
+        hs = registry.hedger.stats()
+        logger.info("[HEDGE] requests=%d hedged=%d hedge_wins=%d", hs.requests, hs.hedged, hs.hedge_wins)
+    return 0
+
+
+def cmd_jobs(args) -> int:
+    queue = JobQueue(args.queue, wal=args.wal)
+    if args.id is not None:
+        res = queue.result(args.id)
+        if res is None:
+            print(f"job {args.id} not found")
+            return 1
+        status, http_status, body, error = res
+        print(f"status={status} http={http_status} error={error or ''}")
+        print(body)
+        return 0
+    for status, n in sorted(queue.counts().items()):
+        print(f"{status}: {n}")
+    return 0
+
+
+def cmd_watch(args) -> int:
+    logger = logging.getLogger("rustore.watch")
+    registry = AccountRegistry(get_settings(), logger=logger)
+    methods = {m.key: m for m in list_methods(load_all("methods.yaml"))}
+    method = _method(methods, args.method)
+
+    targets = []
+    with open(args.file, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if args.method == "subscription_data_v4":
+                if len(parts) != 3:
+                    raise SystemExit(f"Ожидается 'packageName subscriptionId purchaseId': {line.strip()}")
+                targets.append(v4_target(method, *parts, env=args.env))
+            else:
+                targets.append(state_target(method, parts[0], env=args.env))
+
+    def on_change(change):
+        print(json.dumps({
+            "key": change.key,
+            "method": change.method_key,
+            "ts": change.ts,
+            "diff": [d.as_dict() for d in change.diff],
+        }, ensure_ascii=False), flush=True)
+
+    watcher = SubscriptionWatcher(
+        registry,
+        on_change,
+        policy=PollPolicy(min_interval=args.min_interval, max_interval=args.max_interval),
+        budget_rps=args.rps,
+        max_concurrency=args.concurrency,
+        logger=logger,
+    )
+    watcher.add_many(targets)
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop(wait=False)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    logger = logging.getLogger("rustore.compare")
+    registry = AccountRegistry(get_settings(), logger=logger)
+    methods = {m.key: m for m in list_methods(load_all("methods.yaml"))}
+    method = _method(methods, args.method)
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        values = [line.strip() for line in f if line.strip()]
+
+    extra = {"ignore": [x.strip() for x in args.ignore.split(",") if x.strip()]} if args.ignore is not None else {}
+    results = compare_batch(
+        registry,
+        method,
+        args.param,
+        values,
+        section=args.section,
+        path_params=_parse_kv(args.path),
+        query_params=_parse_kv(args.query),
+        max_workers=args.concurrency,
+        **extra,
+    )
+
+    mismatches = 0
+    for value, r in zip(values, results):
+        if not r.equal:
+            mismatches += 1
+        print(json.dumps({
+            "id": value,
+            "equal": r.equal,
+            "status": {env: (er.error or er.status_code) for env, er in r.results.items()},
+            "diff": [d.as_dict() for d in r.diff],
+        }, ensure_ascii=False))
+    print(f"{len(results) - mismatches} equal, {mismatches} different", file=sys.stderr)
+    return 0 if mismatches == 0 else 1
+
+
+def cmd_catalog_sync(args) -> int:
+    logger = logging.getLogger("rustore.catalog")
+    registry = AccountRegistry(get_settings(), logger=logger)
+    mirror = CatalogMirror(args.db)
+    syncer = CatalogSyncer(
+        mirror,
+        registry,
+        list_methods(load_all("methods.yaml")),
+        args.app_id,
+        kinds=args.kind or list(CATALOG_KINDS),
+        interval=args.interval,
+        on_synced=lambda r: print(
+            f"app={r.app_id} {r.kind}: {r.items} items, {r.changed} changed, {r.removed} removed, {r.seconds:.1f} s"
+        ),
+        logger=logger,
+    )
+    if args.interval <= 0:
+        syncer.sync_all()
+        return 0
+    syncer.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        syncer.stop()
+    return 0
+
+
+def cmd_catalog(args) -> int:
+    mirror = CatalogMirror(args.db)
+    if args.id:
+        rec = mirror.get(args.app_id, args.kind, args.id)
+        if rec is None:
+            print(f"{args.kind} {args.id} not found in the local catalog", file=sys.stderr)
+            return 1
+        records = [rec]
+    else:
+        records = mirror.find(args.app_id, args.kind, status=args.status, item_type=args.type)
+    for rec in records:
+        print(rec.raw.decode("utf-8"))
+    st = mirror.state(args.app_id, args.kind)
+    synced = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(st.finished_at)) if st.finished_at else "never"
+    print(f"{len(records)} record(s), last sync: {synced}", file=sys.stderr)
+    return 0
+
+
+def cmd_loadtest(args) -> int:
+    logger = logging.getLogger("rustore.loadtest")
+    registry = AccountRegistry(get_settings(), logger=logger)
+    methods = {m.key: m for m in list_methods(load_all("methods.yaml"))}
+    if args.file:
+        rows = _read_jobs_file(args.file)
+    else:
+        if not args.method:
+            raise SystemExit("Нужен --method или --file")
+        rows = [{
+            "method": args.method,
+            "path": _parse_kv(args.path),
+            "query": _parse_kv(args.query),
+            "body": json.loads(args.body) if args.body else None,
+        }]
+    for r in rows:
+        r.setdefault("env", args.env)
+    try:
+        scenario = scenario_from_dicts(rows, methods)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    validators = compile_validators(methods.values())
+    bad = validate_batch(validators, rows)
+    if bad:
+        for i, errs in sorted(bad.items()):
+            print(f"request #{i + 1}: " + "; ".join(errs), file=sys.stderr)
+        return 2
+
+    gen = LoadGenerator(
+        registry,
+        scenario,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        timeout=args.timeout,
+        poisson=args.poisson,
+        max_backlog=args.max_backlog,
+        on_second=lambda st: print(format_second(st), file=sys.stderr, flush=True),
+        logger=logger,
+    )
+    try:
+        report = gen.run()
+    except KeyboardInterrupt:
+        gen.stop()
+        return 130
+    print(format_report(report))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="cli.py", description="RuStore Public API: пакетные вызовы и воркеры")
+    p.add_argument("-v", "--verbose", action="store_true")
+    p.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help="профилировать запуск (cProfile + tracemalloc): отчёт в REPORT, сырые данные в REPORT .prof",
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    def add_queue_args(sp):
+        sp.add_argument("--queue", default="jobs.sqlite3", help="SQLite-файл очереди")
+        sp.add_argument("--wal", action="store_true", help="WAL-журнал (только если все воркеры на одной машине)")
+
+    sp = sub.add_parser("enqueue", help="добавить задания в очередь")
+    add_queue_args(sp)
+    sp.add_argument("--file", help=".jsonl: {\"method\", \"env\", \"path\", \"query\", \"body\"} на строку")
+    sp.add_argument("--method")
+    sp.add_argument("--env", default="prod")
+    sp.add_argument("--path", action="append", metavar="NAME=VALUE")
+    sp.add_argument("--query", action="append", metavar="NAME=VALUE")
+    sp.add_argument("--body", help="JSON")
+    sp.add_argument("--max-attempts", type=int, default=3)
+    sp.set_defaults(func=cmd_enqueue)
+
+    sp = sub.add_parser("worker", help="выполнять задания из очереди")
+    add_queue_args(sp)
+    sp.add_argument("--concurrency", type=int, default=4)
+    sp.add_argument("--lease", type=float, default=120.0, help="секунд аренды задания")
+    sp.add_argument("--once", action="store_true", help="выйти, когда очередь пуста")
+    sp.set_defaults(func=cmd_worker)
+
+    sp = sub.add_parser("jobs", help="состояние очереди / результат задания")
+    add_queue_args(sp)
+    sp.add_argument("--id", type=int)
+    sp.set_defaults(func=cmd_jobs)
+
+    sp = sub.add_parser("watch", help="следить за подписками, печатать изменения (jsonl)")
+    sp.add_argument("--method", default="subscription_status", choices=["subscription_status", "subscription_data_v4"])
+    sp.add_argument("--env", default="prod")
+    sp.add_argument("--file", required=True, help="subscriptionToken на строку (v4: packageName subscriptionId purchaseId)")
+    sp.add_argument("--rps", type=float, default=5.0, help="общий бюджет запросов в секунду")
+    sp.add_argument("--concurrency", type=int, default=8)
+    sp.add_argument("--min-interval", type=float, default=30.0)
+    sp.add_argument("--max-interval", type=float, default=6 * 3600.0)
+    sp.set_defaults(func=cmd_watch)
+
+    sp = sub.add_parser("compare", help="сравнить prod и sandbox по списку id (jsonl с диффами)")
+    sp.add_argument("--method", required=True)
+    sp.add_argument("--param", required=True, help="параметр, в который подставляется id, например invoiceId")
+    sp.add_argument("--section", default="path", choices=["path", "query"])
+    sp.add_argument("--file", required=True, help="id на строку")
+    sp.add_argument("--path", action="append", metavar="NAME=VALUE", help="остальные path-параметры")
+    sp.add_argument("--query", action="append", metavar="NAME=VALUE", help="остальные query-параметры")
+    sp.add_argument("--ignore", help="игнорируемые поля через запятую (по умолчанию — стандартный список)")
+    sp.add_argument("--concurrency", type=int, default=8)
+    sp.set_defaults(func=cmd_compare)
+
+    sp = sub.add_parser("loadtest", help="нагрузочный тест: пропускная способность и перцентили задержек")
+    sp.add_argument("--file", help="сценарий .jsonl (как у enqueue, плюс необязательный weight)")
+    sp.add_argument("--method")
+    sp.add_argument("--env", default="sandbox")
+    sp.add_argument("--path", action="append", metavar="NAME=VALUE")
+    sp.add_argument("--query", action="append", metavar="NAME=VALUE")
+    sp.add_argument("--body", help="JSON")
+    sp.add_argument("--rps", type=float, default=0.0, help="целевой RPS, открытый цикл (0 = закрытый цикл по --concurrency)")
+    sp.add_argument("--concurrency", type=int, default=16, help="максимум одновременных вызовов")
+    sp.add_argument("--duration", type=float, default=30.0, help="секунд")
+    sp.add_argument("--timeout", type=float, help="дедлайн одного вызова, секунд")
+    sp.add_argument("--poisson", action="store_true", help="пуассоновский поток вместо равномерного")
+    sp.add_argument(
+        "--max-backlog", type=int, default=0,
+        help="открытый цикл: сколько запросов может ждать свободного потока, лишние отбрасываются (0 = без ограничения)",
+    )
+    sp.set_defaults(func=cmd_loadtest)
+
+    sp = sub.add_parser("catalog-sync", help="синхронизировать локальную копию каталога")
+    sp.add_argument("--app-id", action="append", required=True)
+    sp.add_argument("--kind", action="append", choices=list(CATALOG_KINDS))
+    sp.add_argument("--db", help="SQLite-файл каталога (по умолчанию catalog.sqlite3 рядом с приложением)")
+    sp.add_argument("--interval", type=float, default=0.0, help="секунд между синхронизациями (0 = один проход)")
+    sp.set_defaults(func=cmd_catalog_sync)
+
+    sp = sub.add_parser("catalog", help="поиск в локальной копии каталога (jsonl)")
+    sp.add_argument("--app-id", required=True)
+    sp.add_argument("--kind", default="product", choices=list(CATALOG_KINDS))
+    sp.add_argument("--id", help="productId / subscriptionId")
+    sp.add_argument("--status")
+    sp.add_argument("--type", help="productType")
+    sp.add_argument("--db")
+    sp.set_defaults(func=cmd_catalog)
+
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    if not args.profile:
+        return args.func(args)
+    with profile_run(args.profile):
+        rc = args.func(args)
+    print(f"profile report: {args.profile}", file=sys.stderr)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable
+import logging
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .api_client import RuStoreApiClient
+from .circuit_breaker import BreakerBoard, load_breaker_policy
+from .deadline import Deadline
+from .hedging import Hedger, load_hedge_policy
+from .config import Settings
+from .methods import MethodDef
+from .rate_limit import RateLimiter
+from .service import RuStoreService
+from .token_manager import RuStoreTokenManager
+from .validation import ValidationError
+
+# Params used to pick an account for a call
+ROUTING_PARAMS = ("appId", "packageName")
+
+
+@dataclass(frozen=True)
+class Account:
+    name: str
+    key_id: str
+    private_key_b64: str
+    app_ids: frozenset[str] = frozenset()
+    package_names: frozenset[str] = frozenset()
+    rate_limit_rps: float = 0.0           # 0 = без ограничения
+    pool_size: int = 10
+
+
+@dataclass
+class AccountContext:
+    account: Account
+    settings: Settings
+    tm: RuStoreTokenManager
+    client: RuStoreApiClient
+    service: RuStoreService
+    limiter: RateLimiter
+
+
+@dataclass
+class BatchJob:
+    method: MethodDef
+    env: str
+    path_params: Dict[str, Any] = field(default_factory=dict)
+    query_params: Dict[str, Any] = field(default_factory=dict)
+    body: Dict[str, Any] | None = None
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    account: str | None
+    response: requests.Response | None = None
+    url: str | None = None
+    error: Exception | None = None
+
+
+def _split_env_list(value: str) -> frozenset[str]:
+    return frozenset(x.strip() for x in (value or "").split(",") if x.strip())
+
+
+def load_accounts(settings: Settings) -> list[Account]:
+    """
+    RUSTORE_ACCOUNTS=shop_a,shop_b enables several keys; per account:
+      RUSTORE_<NAME>_KEY_ID, RUSTORE_<NAME>_PRIVATE_KEY_B64,
+      RUSTORE_<NAME>_APP_IDS, RUSTORE_<NAME>_PACKAGE_NAMES (через запятую),
+      RUSTORE_<NAME>_RPS, RUSTORE_<NAME>_POOL_SIZE.
+    Without RUSTORE_ACCOUNTS the single key from Settings is used as "default".
+    """
+    names = [n for n in _split_env_list(os.getenv("RUSTORE_ACCOUNTS", ""))]
+    if not names:
+        return [
+            Account(
+                name="default",
+                key_id=settings.key_id,
+                private_key_b64=settings.private_key_b64,
+                rate_limit_rps=float(os.getenv("RUSTORE_RPS", "0")),
+                pool_size=int(os.getenv("RUSTORE_POOL_SIZE", "10")),
+            )
+        ]
+
+    out: list[Account] = []
+    for name in sorted(names):
+        prefix = f"RUSTORE_{name.upper()}_"
+        key_id = os.getenv(prefix + "KEY_ID", "")
+        private_key_b64 = os.getenv(prefix + "PRIVATE_KEY_B64", "")
+        if not key_id or not private_key_b64:
+            raise RuntimeError(f"Не заданы {prefix}KEY_ID / {prefix}PRIVATE_KEY_B64 в .env")
+        out.append(
+            Account(
+                name=name,
+                key_id=key_id,
+                private_key_b64=private_key_b64,
+                app_ids=_split_env_list(os.getenv(prefix + "APP_IDS", "")),
+                package_names=_split_env_list(os.getenv(prefix + "PACKAGE_NAMES", "")),
+                rate_limit_rps=float(os.getenv(prefix + "RPS", "0")),
+                pool_size=int(os.getenv(prefix + "POOL_SIZE", "10")),
+            )
+        )
+    return out
+
+
+class AccountRegistry:
+    """
+    Several RuStore keys, each with its own token manager, HTTP connection pool
+    and rate limit. Calls are routed to an account by appId / packageName.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        accounts: list[Account] | None = None,
+        logger: logging.Logger | None = None,
+        default_account: str | None = None,
+    ):
+        self.settings = settings
+        self.logger = logger
+        # endpoint health doesn't depend on the key, so all accounts share one board
+        self.breakers = BreakerBoard(load_breaker_policy(), logger=logger)
+        hedge_policy = load_hedge_policy()
+        self.hedger = Hedger(hedge_policy) if hedge_policy else None
+        self._contexts: Dict[str, AccountContext] = {}
+        self._by_app_id: Dict[str, str] = {}
+        self._by_package: Dict[str, str] = {}
+
+        for acc in accounts if accounts is not None else load_accounts(settings):
+            self._contexts[acc.name] = self._build_context(acc)
+            for app_id in acc.app_ids:
+                self._by_app_id[app_id] = acc.name
+            for pkg in acc.package_names:
+                self._by_package[pkg] = acc.name
+
+        if not self._contexts:
+            raise RuntimeError("Не задан ни один аккаунт RuStore")
+
+        default_account = default_account or os.getenv("RUSTORE_DEFAULT_ACCOUNT", "").strip() or None
+        if default_account is None and len(self._contexts) == 1:
+            default_account = next(iter(self._contexts))
+        if default_account is not None and default_account not in self._contexts:
+            raise RuntimeError(f"Аккаунт по умолчанию '{default_account}' не найден")
+        self.default_account = default_account
+
+    def _build_context(self, acc: Account) -> AccountContext:
+        acc_settings = replace(self.settings, key_id=acc.key_id, private_key_b64=acc.private_key_b64)
+        limiter = RateLimiter(acc.rate_limit_rps)
+        tm = RuStoreTokenManager(acc_settings, logger=self.logger)
+        client = RuStoreApiClient(
+            acc_settings,
+            tm,
+            logger=self.logger,
+            rate_limiter=limiter,
+            breakers=self.breakers,
+            hedger=self.hedger,
+        )
+        adapter = HTTPAdapter(pool_connections=acc.pool_size, pool_maxsize=acc.pool_size)
+        client.session.mount("https://", adapter)
+        client.session.mount("http://", adapter)
+        return AccountContext(
+            account=acc,
+            settings=acc_settings,
+            tm=tm,
+            client=client,
+            service=RuStoreService(client),
+            limiter=limiter,
+        )
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._contexts)
+
+    def contexts(self) -> list[AccountContext]:
+        return list(self._contexts.values())
+
+    def get(self, name: str) -> AccountContext:
+        ctx = self._contexts.get(name)
+        if ctx is None:
+            raise KeyError(f"Аккаунт '{name}' не найден")
+        return ctx
+
+    def resolve_name(self, path_params: Dict[str, Any] | None, query_params: Dict[str, Any] | None = None) -> str:
+        for params in (path_params or {}, query_params or {}):
+            app_id = params.get("appId")
+            if app_id not in (None, "") and str(app_id) in self._by_app_id:
+                return self._by_app_id[str(app_id)]
+            pkg = params.get("packageName")
+            if pkg not in (None, "") and str(pkg) in self._by_package:
+                return self._by_package[str(pkg)]
+
+        if self.default_account is None:
+            keys = {
+                k: v
+                for params in (path_params or {}, query_params or {})
+                for k, v in params.items()
+                if k in ROUTING_PARAMS
+            }
+            raise ValueError(f"Не удалось выбрать аккаунт по параметрам {keys}; задайте RUSTORE_DEFAULT_ACCOUNT")
+        return self.default_account
+
+    def route(self, path_params: Dict[str, Any] | None, query_params: Dict[str, Any] | None = None) -> AccountContext:
+        return self._contexts[self.resolve_name(path_params, query_params)]
+
+    def call_method(
+        self,
+        method: MethodDef,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        deadline: Deadline | None = None,
+    ):
+        ctx = self.route(path_params, query_params)
+        return ctx.service.call_method(
+            method,
+            env,
+            path_params=path_params,
+            query_params=query_params,
+            body=body,
+            deadline=deadline,
+        )
+
+    def run_batch(
+        self,
+        jobs: Iterable[BatchJob],
+        *,
+        max_workers_per_account: int = 4,
+        deadline: Deadline | None = None,
+    ) -> list[BatchResult]:
+        """
+        Runs jobs in parallel: one worker pool per account, so each account is
+        throttled only by its own rate limit. Results keep the input order.
+        All jobs are validated up front; invalid ones are never sent.
+        `deadline` is shared by the whole batch: jobs still queued when it
+        expires fail with DeadlineExceeded without being sent.
+        """
+        jobs = list(jobs)
+        results: list[BatchResult | None] = [None] * len(jobs)
+        pools: Dict[str, ThreadPoolExecutor] = {}
+        futures: list[tuple[int, str, Future]] = []
+
+        routed: list[tuple[int, str]] = []
+        for i, job in enumerate(jobs):
+            try:
+                name = self.resolve_name(job.path_params, job.query_params)
+                self._contexts[name].service.validator(job.method).validate(
+                    job.env,
+                    path_params=job.path_params,
+                    query_params=job.query_params,
+                    body=job.body,
+                )
+            except ValidationError as e:
+                results[i] = BatchResult(job=job, account=name, error=e)
+                continue
+            except ValueError as e:
+                results[i] = BatchResult(job=job, account=None, error=e)
+                continue
+            routed.append((i, name))
+
+        try:
+            for i, name in routed:
+                job = jobs[i]
+                pool = pools.get(name)
+                if pool is None:
+                    pool = ThreadPoolExecutor(
+                        max_workers=max_workers_per_account,
+                        thread_name_prefix=f"rustore-{name}",
+                    )
+                    pools[name] = pool
+                service = self._contexts[name].service
+                fut = pool.submit(
+                    service.call_method,
+                    job.method,
+                    job.env,
+                    path_params=job.path_params,
+                    query_params=job.query_params,
+                    body=job.body,
+                    deadline=deadline,
+                )
+                futures.append((i, name, fut))
+
+            for i, name, fut in futures:
+                try:
+                    resp, url = fut.result()
+                    results[i] = BatchResult(job=jobs[i], account=name, response=resp, url=url)
+                except Exception as e:
+                    results[i] = BatchResult(job=jobs[i], account=name, error=e)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        return [r for r in results if r is not None]
@@ -7,25 +7,128 @@ import requests
 from .config import Settings
 from .token_manager import RuStoreTokenManager
 from .logging_utils import format_json_for_log, format_response_text
+from .rate_limit import RateLimiter
+from .circuit_breaker import BreakerBoard, CircuitBreaker, breaker_key
+from .hedging import Hedger
+from .deadline import Deadline, DeadlineExceeded, step_timeout
 
-class RuStoreApiClient:
-    def __init__(self, settings: Settings, token_manager: RuStoreTokenManager, logger: logging.Logger | None = None):
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryState:
+    """
+    Retry, backoff, breaker and deadline decisions for one request. The sync
+    and async clients drive it the same way and only do the I/O themselves:
+
+        timeout = state.begin()                 # before each attempt
+        ... wait for the rate limiter: on timeout raise state.rate_limit_exceeded()
+        ... send: on a transport error sleep state.after_error(exc) and try again,
+        ... otherwise sleep state.after_response(resp) and try again, or return resp if None
+    """
+
+    retries = 3
+
+    def __init__(
+        self,
+        settings: Settings,
+        http_method: str,
+        url: str,
+        breaker: CircuitBreaker | None,
+        deadline: Deadline | None,
+    ):
+        self.settings = settings
+        self.what = f"{http_method} {url}"
+        self.breaker = breaker
+        self.deadline = deadline
+        self.attempt = 0
+        self.backoff = 0.5
+
+    def begin(self) -> float:
+        """Timeout for the next attempt; raises DeadlineExceeded / CircuitOpenError instead of starting it."""
+        self.attempt += 1
+        # each attempt gets what is left of the call's deadline, not a fresh http_timeout_seconds
+        timeout = step_timeout(self.deadline, self.settings.http_timeout_seconds, self.what)
+        if self.breaker:
+            # raises CircuitOpenError, also between retries if another caller tripped it
+            self.breaker.allow()
+        return timeout
+
+    def rate_limit_wait(self) -> float | None:
+        """How long the rate limiter may be waited for (None — without limit)."""
+        return self.deadline and self.deadline.remaining()
+
+    def rate_limit_exceeded(self) -> DeadlineExceeded:
+        if self.breaker:
+            # the half-open probe slot was taken but nothing is sent
+            self.breaker.release_probe()
+        return DeadlineExceeded(f"Истёк дедлайн {self.deadline.seconds:g} с в ожидании лимита запросов")
+
+    def _next_backoff(self) -> float:
+        pause = self.backoff
+        self.backoff *= 2
+        return pause
+
+    def after_error(self, exc: Exception) -> float:
+        """Pause before retrying after a transport error; raises when there is no retry."""
+        if self.deadline and self.deadline.expired:
+            # our own budget cut the attempt short; not the endpoint's fault,
+            # and a half-open probe that gave no verdict must not hold its slot
+            if self.breaker:
+                self.breaker.release_probe()
+            raise DeadlineExceeded(f"Истёк дедлайн {self.deadline.seconds:g} с ({self.what})") from exc
+        if self.breaker:
+            self.breaker.record_failure()
+        if self.attempt >= self.retries:
+            raise exc
+        if self.deadline and self.deadline.remaining() <= self.backoff:
+            raise DeadlineExceeded(f"Истёк дедлайн {self.deadline.seconds:g} с, повтор не успеет ({self.what})") from exc
+        return self._next_backoff()
+
+    def after_response(self, resp) -> float | None:
+        """Pause before retrying this response's status, or None to return it."""
+        if self.breaker:
+            # 4xx / 429 mean the endpoint is up; only 5xx count against it
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if resp.status_code not in RETRY_STATUSES or self.attempt >= self.retries:
+            return None
+        if self.deadline and self.deadline.remaining() <= self.backoff:
+            # no time for another attempt: the caller gets the last real response
+            return None
+        return self._next_backoff()
+
+
+class ApiClientBase:
+    """Request building and redacted logging shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        token_manager,
+        logger: logging.Logger | None = None,
+        *,
+        rate_limiter: RateLimiter | None = None,
+        breakers: BreakerBoard | None = None,
+        hedger: Hedger | None = None,
+    ):
         self.settings = settings
         self.tm = token_manager
         self.logger = logger
-        self.session = requests.Session()
+        self.rate_limiter = rate_limiter
+        self.breakers = breakers if breakers is not None else BreakerBoard(logger=logger)
+        self.hedger = hedger
 
-    def call(
+    def _prepare(
         self,
         http_method: str,
         path_template: str,
-        *,
+        token: str,
         path_params: Dict[str, Any],
         query_params: Dict[str, Any],
-        body: Dict[str, Any] | None
-    ) -> Tuple[requests.Response, str]:
-        token = self.tm.get_token()
-
+        body: Dict[str, Any] | None,
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         path = path_template.format(**path_params)
         url = f"{self.settings.base_url}{path}"
 
@@ -49,10 +152,62 @@ class RuStoreApiClient:
                 json.dumps(qp, ensure_ascii=False),
                 format_json_for_log(body) if body else None,
             )
+        return url, headers, qp
+
+    def _log_response(self, resp):
+        if self.logger:
+            self.logger.info(
+                "[API][RESPONSE] %s\nheaders=%s\nbody=%s",
+                resp.status_code,
+                json.dumps(dict(resp.headers), ensure_ascii=False),
+                format_response_text(resp.text),
+            )
+
+
+class RuStoreApiClient(ApiClientBase):
+    def __init__(
+        self,
+        settings: Settings,
+        token_manager: RuStoreTokenManager,
+        logger: logging.Logger | None = None,
+        *,
+        rate_limiter: RateLimiter | None = None,
+        breakers: BreakerBoard | None = None,
+        hedger: Hedger | None = None,
+    ):
+        super().__init__(
+            settings, token_manager, logger, rate_limiter=rate_limiter, breakers=breakers, hedger=hedger
+        )
+        self.session = requests.Session()
+
+    def call(
+        self,
+        http_method: str,
+        path_template: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        hedge: bool = False,
+        deadline: Deadline | None = None,
+    ) -> Tuple[requests.Response, str]:
+        """
+        hedge=True only for idempotent reads (see RuStoreService.call_method).
+        deadline bounds the whole call: token refresh, all attempts and backoff.
+        """
+        key = breaker_key(http_method, path_template)
+        breaker = self.breakers.get(key)
+        # fail fast before signing a token for an endpoint that is known to be down
+        breaker.check()
+        token = self.tm.get_token(deadline=deadline)
+        url, headers, qp = self._prepare(http_method, path_template, token, path_params, query_params, body)
 
         resp = self._request_with_retries(
             http_method,
             url,
+            breaker=breaker,
+            hedge_key=key if hedge else None,
+            deadline=deadline,
             headers=headers,
             params=qp,
             json=body if body else None,
@@ -60,50 +215,55 @@ class RuStoreApiClient:
 
         # если токен протух — ретрай с force_refresh
         if resp.status_code in (401, 403):
-            token2 = self.tm.get_token(force_refresh=True)
+            token2 = self.tm.get_token(force_refresh=True, deadline=deadline, stale=token)
             headers["Public-Token"] = token2
             resp = self._request_with_retries(
                 http_method,
                 url,
+                breaker=breaker,
+                hedge_key=key if hedge else None,
+                deadline=deadline,
                 headers=headers,
                 params=qp,
                 json=body if body else None,
             )
 
-        if self.logger:
-            self.logger.info(
-                "[API][RESPONSE] %s\nheaders=%s\nbody=%s",
-                resp.status_code,
-                json.dumps(dict(resp.headers), ensure_ascii=False),
-                format_response_text(resp.text),
-            )
-
+        self._log_response(resp)
         return resp, url
 
-    def _request_with_retries(self, http_method: str, url: str, **kwargs) -> requests.Response:
-        retries = 3
-        backoff = 0.5
-        last_exc = None
-        for attempt in range(retries):
+    def _request_with_retries(
+        self,
+        http_method: str,
+        url: str,
+        *,
+        breaker: CircuitBreaker | None = None,
+        hedge_key: str | None = None,
+        deadline: Deadline | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        timeout = self.settings.http_timeout_seconds
+
+        def send() -> requests.Response:
+            sent_at = time.time()
+            resp = self.session.request(http_method, url, timeout=timeout, **kwargs)
+            # every response calibrates the clock used to sign the next /auth
+            self.tm.clock.observe(resp.headers.get("Date"), sent_at, time.time())
+            return resp
+
+        state = RetryState(self.settings, http_method, url, breaker, deadline)
+        while True:
+            timeout = state.begin()
+            if self.rate_limiter and not self.rate_limiter.acquire(timeout=state.rate_limit_wait()):
+                raise state.rate_limit_exceeded()
             try:
-                resp = self.session.request(
-                    http_method,
-                    url,
-                    timeout=self.settings.http_timeout_seconds,
-                    **kwargs,
-                )
+                if hedge_key and self.hedger:
+                    resp = self.hedger.send(hedge_key, send, limiter=self.rate_limiter)
+                else:
+                    resp = send()
             except requests.RequestException as exc:
-                last_exc = exc
-                if attempt < retries - 1:
-                    time.sleep(backoff)
-                    backoff *= 2
-                    continue
-                raise
-            if resp.status_code in (429, 500, 502, 503, 504) and attempt < retries - 1:
-                time.sleep(backoff)
-                backoff *= 2
+                time.sleep(state.after_error(exc))
                 continue
-            return resp
-        if last_exc:
-            raise last_exc
-        return resp
+            pause = state.after_response(resp)
+            if pause is None:
+                return resp
+            time.sleep(pause)
@@ -0,0 +1,264 @@
+from typing import Any, AsyncIterator, Dict, Tuple
+import asyncio
+import logging
+import time
+
+import httpx
+
+from .api_client import ApiClientBase, RetryState
+from .circuit_breaker import BreakerBoard, CircuitBreaker, breaker_key
+from .config import Settings
+from .deadline import Deadline, DeadlineExceeded, step_timeout
+from .hedging import Hedger
+from .methods import MethodDef
+from .pagination import PageCursor
+from .rate_limit import RateLimiter
+from .service import ServiceBase
+from .token_manager import TokenManagerBase
+
+
+class AsyncRuStoreTokenManager(TokenManagerBase):
+    """
+    RuStoreTokenManager for asyncio. Concurrent callers that find the token
+    expired wait for a single /auth request instead of each sending their own.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        logger: logging.Logger | None = None,
+        *,
+        http: httpx.AsyncClient | None = None,
+    ):
+        super().__init__(settings, logger)
+        # AsyncRuStoreApiClient hands over its own client if none is given
+        self.http = http
+        self._refresh_lock = asyncio.Lock()
+
+    async def get_token(
+        self,
+        force_refresh: bool = False,
+        *,
+        deadline: Deadline | None = None,
+        stale: str | None = None,
+    ) -> str:
+        """
+        stale: the token a 401/403 came back for. A forced refresh is skipped if
+        another task has already replaced it, so a burst of 401s costs one /auth.
+        """
+        if (not force_refresh) and self._valid():
+            return self._token.jwe
+
+        # without a deadline, wait as long as the refresh in progress (it has its own HTTP timeout)
+        lock_wait = None if deadline is None else deadline.timeout(deadline.seconds, "авторизация")
+        try:
+            await asyncio.wait_for(self._refresh_lock.acquire(), lock_wait)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Истёк дедлайн {deadline.seconds:g} с (авторизация)") from None
+        try:
+            if self._valid() and (not force_refresh or (stale is not None and self._token.jwe != stale)):
+                return self._token.jwe
+
+            if self.http is None:
+                self.http = httpx.AsyncClient()
+            for attempt in range(2):
+                timeout = step_timeout(deadline, self.settings.http_timeout_seconds, "авторизация")
+                # RSA signing is CPU work; keep it off the event loop
+                url, payload, signed_offset = await asyncio.to_thread(self._auth_request)
+                try:
+                    sent_at, sent_mono = time.time(), time.monotonic()
+                    r = await self.http.post(url, json=payload, timeout=timeout)
+                    self._log_auth_response(r)
+                    if self._observe_auth(r, sent_at, signed_offset) and attempt == 0:
+                        continue
+                    r.raise_for_status()
+                    data = r.json()
+                except Exception as e:
+                    self._auth_failed(e, deadline, isinstance(e, httpx.HTTPError))
+                    raise
+
+                return self._accept(data, sent_mono)
+        finally:
+            self._refresh_lock.release()
+
+    async def aclose(self):
+        if self.http is not None:
+            await self.http.aclose()
+
+
+class AsyncRuStoreApiClient(ApiClientBase):
+    """
+    RuStoreApiClient on httpx.AsyncClient: same retries, backoff, 401/403
+    re-auth, breakers, hedging, deadlines and log redaction, but every wait
+    (network, backoff, rate limit) is an await, so thousands of calls can be
+    in flight on one loop. `max_connections` caps open sockets; calls beyond
+    it queue in the pool (bounded by the deadline / timeout).
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        token_manager: AsyncRuStoreTokenManager,
+        logger: logging.Logger | None = None,
+        *,
+        rate_limiter: RateLimiter | None = None,
+        breakers: BreakerBoard | None = None,
+        hedger: Hedger | None = None,
+        http: httpx.AsyncClient | None = None,
+        max_connections: int = 100,
+    ):
+        super().__init__(
+            settings, token_manager, logger, rate_limiter=rate_limiter, breakers=breakers, hedger=hedger
+        )
+        self.http = http or httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=settings.http_timeout_seconds,
+        )
+        if token_manager.http is None:
+            token_manager.http = self.http
+
+    async def call(
+        self,
+        http_method: str,
+        path_template: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        hedge: bool = False,
+        deadline: Deadline | None = None,
+    ) -> Tuple[httpx.Response, str]:
+        key = breaker_key(http_method, path_template)
+        breaker = self.breakers.get(key)
+        breaker.check()
+        token = await self.tm.get_token(deadline=deadline)
+        url, headers, qp = self._prepare(http_method, path_template, token, path_params, query_params, body)
+
+        resp = await self._request_with_retries(
+            http_method,
+            url,
+            breaker=breaker,
+            hedge_key=key if hedge else None,
+            deadline=deadline,
+            headers=headers,
+            params=qp,
+            json=body if body else None,
+        )
+
+        if resp.status_code in (401, 403):
+            token2 = await self.tm.get_token(force_refresh=True, deadline=deadline, stale=token)
+            headers["Public-Token"] = token2
+            resp = await self._request_with_retries(
+                http_method,
+                url,
+                breaker=breaker,
+                hedge_key=key if hedge else None,
+                deadline=deadline,
+                headers=headers,
+                params=qp,
+                json=body if body else None,
+            )
+
+        self._log_response(resp)
+        return resp, url
+
+    async def _acquire(self, state: RetryState):
+        wait = self.rate_limiter.reserve(max_wait=state.rate_limit_wait())
+        if wait is None:
+            raise state.rate_limit_exceeded()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _request_with_retries(
+        self,
+        http_method: str,
+        url: str,
+        *,
+        breaker: CircuitBreaker | None = None,
+        hedge_key: str | None = None,
+        deadline: Deadline | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        timeout = self.settings.http_timeout_seconds
+
+        async def send() -> httpx.Response:
+            sent_at = time.time()
+            resp = await self.http.request(http_method, url, timeout=timeout, **kwargs)
+            self.tm.clock.observe(resp.headers.get("Date"), sent_at, time.time())
+            return resp
+
+        state = RetryState(self.settings, http_method, url, breaker, deadline)
+        while True:
+            timeout = state.begin()
+            if self.rate_limiter:
+                try:
+                    await self._acquire(state)
+                except asyncio.CancelledError:
+                    # cancelled before sending: give the probe slot back (a deadline already did)
+                    if breaker:
+                        breaker.release_probe()
+                    raise
+            try:
+                if hedge_key and self.hedger:
+                    resp = await self.hedger.send_async(hedge_key, send, limiter=self.rate_limiter)
+                else:
+                    resp = await send()
+            except httpx.TransportError as exc:
+                await asyncio.sleep(state.after_error(exc))
+                continue
+            pause = state.after_response(resp)
+            if pause is None:
+                return resp
+            await asyncio.sleep(pause)
+
+    async def aclose(self):
+        await self.http.aclose()
+        if self.tm.http is not None and self.tm.http is not self.http:
+            await self.tm.aclose()
+
+    async def __aenter__(self) -> "AsyncRuStoreApiClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+        return False
+
+
+class AsyncRuStoreService(ServiceBase):
+    client: AsyncRuStoreApiClient
+
+    async def call_method(
+        self,
+        method: MethodDef,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        deadline: Deadline | None = None,
+    ) -> Tuple[httpx.Response, str]:
+        return await self.client.call(
+            **self._call_args(method, env, path_params, query_params, body), deadline=deadline
+        )
+
+    async def iter_pages(
+        self,
+        method: MethodDef,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        max_pages: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """`async for page in service.iter_pages(...)` — see RuStoreService.iter_pages."""
+        cursor = PageCursor(method, query_params, max_pages)
+        while True:
+            resp, _url = await self.call_method(
+                method, env, path_params=path_params, query_params=cursor.query(), body=None, deadline=deadline
+            )
+            resp.raise_for_status()
+            page = resp.json()
+            yield page
+            if not cursor.advance(page):
+                return
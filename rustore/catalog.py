@@ -0,0 +1,423 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .methods import MethodDef
+from .models import ModelRegistry, Record, load_models
+from .pagination import next_token, page_items, token_param_for
+from .resource import app_dir
+
+
+@dataclass(frozen=True)
+class CatalogKind:
+    name: str
+    method_key: str
+    model: str
+    items_key: str
+    id_field: str
+    status_field: str
+    type_field: str | None = None
+    query: tuple[tuple[str, str], ...] = ()
+
+
+CATALOG_KINDS: Dict[str, CatalogKind] = {
+    "product": CatalogKind(
+        name="product",
+        method_key="catalog_products",
+        model="CatalogProduct",
+        items_key="products",
+        id_field="productId",
+        status_field="productStatus",
+        type_field="productType",
+        # productType is required by the API; the mirror keeps every type
+        query=(("productType", "consumable,non-consumable"),),
+    ),
+    "subscription": CatalogKind(
+        name="subscription",
+        method_key="catalog_subscriptions",
+        model="CatalogSubscription",
+        items_key="subscriptions",
+        id_field="subscriptionId",
+        status_field="subscriptionStatus",
+    ),
+}
+
+# statuses of a first resumed page that mean the saved page token itself was refused
+REFUSED_TOKEN_STATUSES = (400, 404, 410)
+
+
+def _token_refused(exc: Exception) -> bool:
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in REFUSED_TOKEN_STATUSES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    app_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    status TEXT,
+    item_type TEXT,
+    hash TEXT NOT NULL,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    sync_gen INTEGER NOT NULL,
+    PRIMARY KEY (app_id, kind, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_catalog_status ON catalog(app_id, kind, status);
+CREATE INDEX IF NOT EXISTS ix_catalog_type ON catalog(app_id, kind, item_type);
+CREATE TABLE IF NOT EXISTS catalog_sync (
+    app_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    gen INTEGER NOT NULL DEFAULT 0,
+    resume_token TEXT,
+    pass_started_at REAL,
+    finished_at REAL,
+    items INTEGER,
+    changed INTEGER,
+    removed INTEGER,
+    PRIMARY KEY (app_id, kind)
+);
+"""
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    app_id: str
+    kind: str
+    pages: int
+    items: int
+    changed: int
+    removed: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class SyncState:
+    app_id: str
+    kind: str
+    gen: int
+    finished_at: float | None
+    items: int | None
+    in_progress: bool
+
+
+def default_catalog_path() -> str:
+    return os.path.join(app_dir(), "catalog.sqlite3")
+
+
+def _canonical(item: Any) -> bytes:
+    return json.dumps(item, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class CatalogMirror:
+    """
+    Local SQLite copy of catalog_products / catalog_subscriptions per appId.
+
+    Lookups hit the primary key or the (status) / (type) indexes and return
+    models.yaml records decoded lazily from the stored JSON, so reading a
+    product is a local index probe instead of an API call.
+
+    Sync is incremental: only items whose content hash changed are rewritten,
+    the continuation token is saved after every page so an interrupted pass
+    resumes where it stopped, and items missing from a completed pass are
+    removed.
+    """
+
+    def __init__(self, path: str | None = None, *, models: ModelRegistry | None = None):
+        self.path = path or default_catalog_path()
+        self.models = models or load_models()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- lookups ----------------
+    def _record(self, kind: CatalogKind, data: bytes) -> Record:
+        return self.models[kind.model](data)
+
+    def get(self, app_id: Any, kind: str, item_id: str) -> Record | None:
+        k = CATALOG_KINDS[kind]
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM catalog WHERE app_id = ? AND kind = ? AND item_id = ?",
+                (str(app_id), kind, str(item_id)),
+            ).fetchone()
+        return None if row is None else self._record(k, row[0])
+
+    def get_product(self, app_id: Any, product_id: str) -> Record | None:
+        return self.get(app_id, "product", product_id)
+
+    def get_subscription(self, app_id: Any, subscription_id: str) -> Record | None:
+        return self.get(app_id, "subscription", subscription_id)
+
+    def find(
+        self,
+        app_id: Any,
+        kind: str,
+        *,
+        status: str | None = None,
+        item_type: str | None = None,
+    ) -> list[Record]:
+        k = CATALOG_KINDS[kind]
+        sql = "SELECT data FROM catalog WHERE app_id = ? AND kind = ?"
+        args: list[Any] = [str(app_id), kind]
+        if status is not None:
+            sql += " AND status = ?"
+            args.append(status)
+        if item_type is not None:
+            sql += " AND item_type = ?"
+            args.append(item_type)
+        sql += " ORDER BY item_id"
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [self._record(k, r[0]) for r in rows]
+
+    def products(self, app_id: Any, *, status: str | None = None, product_type: str | None = None) -> list[Record]:
+        return self.find(app_id, "product", status=status, item_type=product_type)
+
+    def subscriptions(self, app_id: Any, *, status: str | None = None) -> list[Record]:
+        return self.find(app_id, "subscription", status=status)
+
+    def state(self, app_id: Any, kind: str) -> SyncState:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT gen, finished_at, items, resume_token FROM catalog_sync WHERE app_id = ? AND kind = ?",
+                (str(app_id), kind),
+            ).fetchone()
+        if row is None:
+            return SyncState(str(app_id), kind, 0, None, None, False)
+        return SyncState(str(app_id), kind, row[0], row[1], row[2], row[3] is not None)
+
+    # ---------------- sync ----------------
+    def _begin_pass(self, app_id: str, kind: str) -> tuple[int, str | None]:
+        """(generation of this pass, token to resume from)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT gen, resume_token FROM catalog_sync WHERE app_id = ? AND kind = ?", (app_id, kind)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO catalog_sync (app_id, kind, gen, pass_started_at) VALUES (?, ?, 0, ?)",
+                    (app_id, kind, time.time()),
+                )
+                self._conn.commit()
+                return 1, None
+            gen, token = row
+            if token is None:
+                self._conn.execute(
+                    "UPDATE catalog_sync SET pass_started_at = ? WHERE app_id = ? AND kind = ?",
+                    (time.time(), app_id, kind),
+                )
+                self._conn.commit()
+            return gen + 1, token
+
+    def _apply_page(self, app_id: str, k: CatalogKind, gen: int, items: list, token: str | None) -> int:
+        now = time.time()
+        ids = [str(it.get(k.id_field)) for it in items]
+        with self._lock:
+            known: Dict[str, str] = {}
+            if ids:
+                known = dict(
+                    self._conn.execute(
+                        "SELECT item_id, hash FROM catalog WHERE app_id = ? AND kind = ? AND item_id IN (%s)"
+                        % ",".join("?" * len(ids)),
+                        (app_id, k.name, *ids),
+                    ).fetchall()
+                )
+
+            changed_rows = []
+            unchanged_ids = []
+            for it in items:
+                item_id = it.get(k.id_field)
+                if item_id in (None, ""):
+                    continue
+                item_id = str(item_id)
+                data = _canonical(it)
+                h = hashlib.sha1(data).hexdigest()
+                if known.get(item_id) == h:
+                    unchanged_ids.append((gen, app_id, k.name, item_id))
+                    continue
+                item_type = it.get(k.type_field) if k.type_field else None
+                changed_rows.append(
+                    (app_id, k.name, item_id, it.get(k.status_field), item_type, h, data, now, gen)
+                )
+
+            self._conn.executemany(
+                "INSERT INTO catalog (app_id, kind, item_id, status, item_type, hash, data, updated_at, sync_gen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (app_id, kind, item_id) DO UPDATE SET status = excluded.status,"
+                " item_type = excluded.item_type, hash = excluded.hash, data = excluded.data,"
+                " updated_at = excluded.updated_at, sync_gen = excluded.sync_gen",
+                changed_rows,
+            )
+            self._conn.executemany(
+                "UPDATE catalog SET sync_gen = ? WHERE app_id = ? AND kind = ? AND item_id = ?",
+                unchanged_ids,
+            )
+            # the resume point is committed together with the page it follows
+            self._conn.execute(
+                "UPDATE catalog_sync SET resume_token = ? WHERE app_id = ? AND kind = ?",
+                (token, app_id, k.name),
+            )
+            self._conn.commit()
+        return len(changed_rows)
+
+    def _clear_resume(self, app_id: str, kind: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE catalog_sync SET resume_token = NULL WHERE app_id = ? AND kind = ?", (app_id, kind)
+            )
+            self._conn.commit()
+
+    def _finish_pass(self, app_id: str, kind: str, gen: int, changed: int) -> int:
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM catalog WHERE app_id = ? AND kind = ? AND sync_gen < ?", (app_id, kind, gen)
+            ).rowcount
+            items = self._conn.execute(
+                "SELECT COUNT(*) FROM catalog WHERE app_id = ? AND kind = ?", (app_id, kind)
+            ).fetchone()[0]
+            self._conn.execute(
+                "UPDATE catalog_sync SET gen = ?, resume_token = NULL, finished_at = ?, items = ?, changed = ?,"
+                " removed = ? WHERE app_id = ? AND kind = ?",
+                (gen, time.time(), items, changed, removed, app_id, kind),
+            )
+            self._conn.commit()
+        return removed
+
+    def sync(
+        self,
+        service,
+        methods: Dict[str, MethodDef],
+        app_id: Any,
+        kind: str,
+        *,
+        env: str = "prod",
+        page_limit: int | None = None,
+        stop: threading.Event | None = None,
+    ) -> SyncResult | None:
+        """
+        One pass over the catalog of `app_id` through RuStoreService.iter_pages
+        (`service` may also be AccountRegistry). Returns None if `stop` was set
+        before the pass finished; the next call resumes from the saved token.
+        """
+        k = CATALOG_KINDS[kind]
+        method = methods[k.method_key]
+        token_param = token_param_for(method)
+        app_id = str(app_id)
+        started = time.perf_counter()
+
+        gen, token = self._begin_pass(app_id, kind)
+        query: Dict[str, Any] = dict(k.query)
+        if page_limit:
+            query["limit"] = page_limit
+        if token and token_param:
+            query[token_param] = token
+
+        if hasattr(service, "route"):
+            # AccountRegistry: the catalog is read with the key that owns appId
+            service = service.route({"appId": app_id}).service
+        pages = items = changed = 0
+        try:
+            for page in service.iter_pages(method, env, path_params={"appId": app_id}, query_params=query):
+                page_list = [it for it in page_items(page, k.items_key) if isinstance(it, dict)]
+                pages += 1
+                items += len(page_list)
+                changed += self._apply_page(
+                    app_id, k, gen, page_list, next_token(page, token_param) if token_param else None
+                )
+                if stop is not None and stop.is_set():
+                    return None
+        except Exception as e:
+            # 5xx, timeouts, deadlines, open breakers: keep the token, the next pass resumes from it
+            if token is None or pages or not _token_refused(e):
+                raise
+            # the saved token itself was refused (e.g. expired): without this every
+            # later pass would fail the same way, so start the pass over from page one
+            self._clear_resume(app_id, kind)
+            return self.sync(service, methods, app_id, kind, env=env, page_limit=page_limit, stop=stop)
+
+        removed = self._finish_pass(app_id, kind, gen, changed)
+        return SyncResult(app_id, kind, pages, items, changed, removed, time.perf_counter() - started)
+
+
+class CatalogSyncer:
+    """Keeps a CatalogMirror fresh in a background thread: every `interval` seconds, every appId and kind."""
+
+    def __init__(
+        self,
+        mirror: CatalogMirror,
+        service,
+        methods: Iterable[MethodDef],
+        app_ids: Iterable[Any],
+        *,
+        kinds: Iterable[str] = tuple(CATALOG_KINDS),
+        env: str = "prod",
+        interval: float = 600.0,
+        on_synced=None,
+        logger: logging.Logger | None = None,
+    ):
+        self.mirror = mirror
+        self.service = service
+        self.methods = {m.key: m for m in methods}
+        self.app_ids = [str(a) for a in app_ids]
+        self.kinds = list(kinds)
+        self.env = env
+        self.interval = interval
+        self.on_synced = on_synced
+        self.logger = logger
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sync_all(self) -> list[SyncResult]:
+        out = []
+        for app_id in self.app_ids:
+            for kind in self.kinds:
+                if self._stop.is_set():
+                    return out
+                try:
+                    res = self.mirror.sync(self.service, self.methods, app_id, kind, env=self.env, stop=self._stop)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.warning("[CATALOG][ERROR] app=%s %s: %s: %s", app_id, kind, type(e).__name__, e)
+                    continue
+                if res is None:
+                    continue
+                if self.logger:
+                    self.logger.info(
+                        "[CATALOG] app=%s %s: %d items, %d changed, %d removed, %.1f s",
+                        app_id, kind, res.items, res.changed, res.removed, res.seconds,
+                    )
+                if self.on_synced:
+                    self.on_synced(res)
+                out.append(res)
+        return out
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_all()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rustore-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        if self._thread is not None and wait:
+            self._thread.join()
+        self._thread = None
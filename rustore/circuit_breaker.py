@@ -0,0 +1,262 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict
+import logging
+import os
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the endpoint's circuit is open."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Эндпоинт временно отключён ({key}), повтор через {retry_after:.1f} с")
+        self.key = key
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    failure_threshold: int = 5        # подряд неудачных попыток
+    error_rate: float = 0.5           # доля ошибок в окне
+    window: int = 20                  # последних попыток в окне
+    min_calls: int = 10               # error_rate учитывается только с этого числа попыток
+    open_seconds: float = 30.0        # сколько держать открытым до пробного запроса
+    half_open_probes: int = 1         # одновременных пробных запросов
+
+
+def load_breaker_policy() -> BreakerPolicy:
+    """
+    RUSTORE_BREAKER_FAILURES, RUSTORE_BREAKER_ERROR_RATE, RUSTORE_BREAKER_OPEN_SECONDS;
+    RUSTORE_BREAKER_FAILURES=0 disables the breaker.
+    """
+    d = BreakerPolicy()
+    return BreakerPolicy(
+        failure_threshold=int(os.getenv("RUSTORE_BREAKER_FAILURES", str(d.failure_threshold))),
+        error_rate=float(os.getenv("RUSTORE_BREAKER_ERROR_RATE", str(d.error_rate))),
+        window=d.window,
+        min_calls=d.min_calls,
+        open_seconds=float(os.getenv("RUSTORE_BREAKER_OPEN_SECONDS", str(d.open_seconds))),
+        half_open_probes=d.half_open_probes,
+    )
+
+
+@dataclass(frozen=True)
+class BreakerStats:
+    key: str
+    state: str
+    consecutive_failures: int
+    error_rate: float
+    calls: int
+    failures: int
+    rejected: int
+    retry_after: float
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` failures in a row or when the
+    error rate over the last `window` attempts reaches `error_rate`;
+    open -> half_open after `open_seconds`, letting a few probes through;
+    one successful probe closes it, a failed one opens it again.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        policy: BreakerPolicy,
+        *,
+        on_state_change: Callable[[str, str, str], None] | None = None,
+    ):
+        self.key = key
+        self.policy = policy
+        self.on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._consecutive = 0
+        self._outcomes: deque[bool] = deque(maxlen=max(1, policy.window))
+        self._probes = 0
+        self._probe_at = 0.0
+        self._calls = 0
+        self._failures = 0
+        self._rejected = 0
+        # transitions made under _lock, reported by _notify() once it is released
+        self._transitions: list[tuple[str, str]] = []
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            state = self._state
+        self._notify()
+        return state
+
+    def _set_state(self, state: str):
+        old, self._state = self._state, state
+        if old != state and self.on_state_change:
+            self._transitions.append((old, state))
+
+    def _notify(self):
+        if not self.on_state_change:
+            return
+        with self._lock:
+            transitions, self._transitions = self._transitions, []
+        for old, new in transitions:
+            self.on_state_change(self.key, old, new)
+
+    def _maybe_half_open(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.policy.open_seconds:
+            self._probes = 0
+            self._set_state(HALF_OPEN)
+        elif self._state == HALF_OPEN and self._probes and now - self._probe_at >= self.policy.open_seconds:
+            # a probe that never reported back (caller died / was cancelled) must not block recovery
+            self._probes = 0
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._probes = 0
+        self._set_state(OPEN)
+
+    def _admit(self, *, take_probe: bool):
+        if self.policy.failure_threshold <= 0:
+            return
+        try:
+            with self._lock:
+                now = time.monotonic()
+                self._maybe_half_open(now)
+                if self._state == CLOSED:
+                    return
+                if self._state == HALF_OPEN and self._probes < self.policy.half_open_probes:
+                    if take_probe:
+                        self._probes += 1
+                        self._probe_at = now
+                    return
+                self._rejected += 1
+                retry_after = max(0.0, self.policy.open_seconds - (now - self._opened_at))
+        finally:
+            self._notify()
+        raise CircuitOpenError(self.key, retry_after)
+
+    def allow(self):
+        """Raises CircuitOpenError if the request must not be sent now; in half_open takes a probe slot."""
+        self._admit(take_probe=True)
+
+    def check(self):
+        """Same as allow() but never takes a probe slot (for a cheap early exit)."""
+        self._admit(take_probe=False)
+
+    def release_probe(self):
+        """
+        Gives back a slot taken by allow() when the request was not sent after
+        all, or was cut short by the caller's deadline and gave no verdict.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._calls += 1
+            self._consecutive = 0
+            self._outcomes.append(True)
+            if self._state != CLOSED:
+                self._outcomes.clear()
+                self._set_state(CLOSED)
+        self._notify()
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self._calls += 1
+            self._failures += 1
+            self._consecutive += 1
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                self._open(now)
+            elif self._state == CLOSED and self._should_trip():
+                self._open(now)
+        self._notify()
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _should_trip(self) -> bool:
+        p = self.policy
+        if p.failure_threshold <= 0:
+            return False
+        if self._consecutive >= p.failure_threshold:
+            return True
+        return len(self._outcomes) >= p.min_calls and self._error_rate() >= p.error_rate
+
+    def reset(self):
+        with self._lock:
+            self._consecutive = 0
+            self._outcomes.clear()
+            self._probes = 0
+            self._set_state(CLOSED)
+        self._notify()
+
+    def stats(self) -> BreakerStats:
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            retry_after = max(0.0, self.policy.open_seconds - (now - self._opened_at)) if self._state == OPEN else 0.0
+            stats = BreakerStats(
+                key=self.key,
+                state=self._state,
+                consecutive_failures=self._consecutive,
+                error_rate=self._error_rate(),
+                calls=self._calls,
+                failures=self._failures,
+                rejected=self._rejected,
+                retry_after=retry_after,
+            )
+        self._notify()
+        return stats
+
+
+class BreakerBoard:
+    """One CircuitBreaker per endpoint key ("GET /public/v2/purchase/{invoiceId}"), created on first use."""
+
+    def __init__(self, policy: BreakerPolicy | None = None, logger: logging.Logger | None = None):
+        self.policy = policy or BreakerPolicy()
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            b = self._breakers.get(key)
+            if b is None:
+                b = CircuitBreaker(key, self.policy, on_state_change=self._log_state_change)
+                self._breakers[key] = b
+            return b
+
+    def _log_state_change(self, key: str, old: str, new: str):
+        # warning / info only: the UI's logger adapter has no log(level, ...)
+        if self.logger:
+            log = self.logger.warning if new == OPEN else self.logger.info
+            log("[API][BREAKER] %s: %s -> %s", key, old, new)
+
+    def stats(self) -> list[BreakerStats]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return sorted((b.stats() for b in breakers), key=lambda s: s.key)
+
+    def reset(self, key: str | None = None):
+        with self._lock:
+            breakers = list(self._breakers.values()) if key is None else [self._breakers[key]]
+        for b in breakers:
+            b.reset()
+
+
+def breaker_key(http_method: str, path_template: str) -> str:
+    return f"{http_method.upper()} {path_template}"
@@ -0,0 +1,372 @@
+from array import array
+from itertools import compress, repeat
+from typing import Any, Dict, Iterable
+import json
+import math
+import operator
+import struct
+import sys
+
+from .pagination import page_items
+
+STR = "str"
+FLOAT = "float"
+INT = "int"
+
+INT_NULL = -(2 ** 63)          # null marker for int columns
+_MAGIC = b"RSCOL1\n"
+
+_CMP = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _get_path(record: Any, parts: tuple[str, ...]) -> Any:
+    cur = record
+    for part in parts:
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(part)
+    return cur
+
+
+class _StrColumn:
+    """Dictionary-encoded strings: array of uint32 codes, code 0 is null."""
+
+    kind = STR
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: list[str | None] = [None]
+        self.index: Dict[str, int] = {}
+
+    def encode(self, value: Any) -> int:
+        if value is None:
+            return 0
+        value = str(value)
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.index[value] = code
+        return code
+
+    def append(self, value: Any):
+        self.codes.append(self.encode(value))
+
+    def get(self, i: int) -> str | None:
+        return self.values[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class _FloatColumn:
+    """float64, NaN is null."""
+
+    kind = FLOAT
+
+    def __init__(self):
+        self.data = array("d")
+
+    def append(self, value: Any):
+        try:
+            self.data.append(float(value) if value is not None else math.nan)
+        except (TypeError, ValueError, OverflowError):
+            self.data.append(math.nan)
+
+    def get(self, i: int) -> float | None:
+        v = self.data[i]
+        return None if v != v else v
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _IntColumn:
+    """int64, INT_NULL is null."""
+
+    kind = INT
+
+    def __init__(self):
+        self.data = array("q")
+
+    def append(self, value: Any):
+        try:
+            self.data.append(int(value) if value is not None else INT_NULL)
+        except (TypeError, ValueError, OverflowError):
+            # beyond int64 or inf: one odd value must not abort the ingest
+            self.data.append(INT_NULL)
+
+    def get(self, i: int) -> int | None:
+        v = self.data[i]
+        return None if v == INT_NULL else v
+
+    def __len__(self):
+        return len(self.data)
+
+
+_COLUMN_TYPES = {STR: _StrColumn, FLOAT: _FloatColumn, INT: _IntColumn}
+
+
+def infer_schema(records: Iterable[Dict[str, Any]], *, sample: int = 100) -> Dict[str, tuple[str, str]]:
+    """
+    Schema {column: (type, source path)} from top-level scalar fields of the first records.
+    Ints stay int unless a float is seen; anything non-numeric becomes str.
+    """
+    kinds: Dict[str, str] = {}
+    for n, rec in enumerate(records):
+        if n >= sample:
+            break
+        for k, v in (rec or {}).items():
+            if v is None or isinstance(v, (dict, list)):
+                continue
+            if isinstance(v, bool) or isinstance(v, str):
+                kind = STR
+            elif isinstance(v, int):
+                kind = INT
+            else:
+                kind = FLOAT
+            prev = kinds.get(k)
+            if prev is None or prev == kind:
+                kinds[k] = kind
+            elif {prev, kind} == {INT, FLOAT}:
+                kinds[k] = FLOAT
+            else:
+                kinds[k] = STR
+    return {k: (t, k) for k, t in kinds.items()}
+
+
+class ColumnStore:
+    """
+    Compact array-backed columnar table for large invoice / purchase exports.
+
+    schema: {column: (type, source path)} — type is "str" (dictionary-encoded),
+    "int" or "float"; source path is a dotted path inside each record.
+
+    Filters produce masks (bytearray of 0/1, one byte per row); masks combine
+    with mask_and / mask_or and are accepted by every aggregate. Most filters
+    are a single map() over the column array. mask_cmp on int columns,
+    sum and the group_* aggregates are single-pass Python loops: they must
+    skip nulls, and a map / compress pass per condition (or a sort per
+    group) measures slower than one loop over the rows.
+    """
+
+    def __init__(self, schema: Dict[str, tuple[str, str]]):
+        self.schema = dict(schema)
+        self.columns: Dict[str, Any] = {}
+        for name, (kind, _path) in self.schema.items():
+            if kind not in _COLUMN_TYPES:
+                raise ValueError(f"{name}: неизвестный тип колонки '{kind}'")
+            self.columns[name] = _COLUMN_TYPES[kind]()
+        self._rows = 0
+        # (column append, source path split once) — the hot loop of ingest
+        self._writers = [
+            (self.columns[name].append, tuple(path.split(".")))
+            for name, (_kind, path) in self.schema.items()
+        ]
+
+    def __len__(self):
+        return self._rows
+
+    # ---------------- ingest ----------------
+    def append(self, record: Dict[str, Any]):
+        for write, parts in self._writers:
+            if len(parts) == 1:
+                write(record.get(parts[0]))
+            else:
+                write(_get_path(record, parts))
+        self._rows += 1
+
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        for rec in records:
+            self.append(rec)
+
+    def extend_pages(self, pages: Iterable[Any], *, items_key: str | None = None) -> int:
+        """Streams records from RuStoreService.iter_pages; returns rows added."""
+        before = self._rows
+        for page in pages:
+            self.extend(page_items(page, items_key))
+        return self._rows - before
+
+    # ---------------- access ----------------
+    def column(self, name: str) -> list:
+        col = self.columns[name]
+        return [col.get(i) for i in range(len(col))]
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {name: col.get(i) for name, col in self.columns.items()}
+
+    def distinct(self, name: str) -> list[str]:
+        col = self._str_column(name)
+        return [v for v in col.values[1:]]
+
+    def _str_column(self, name: str) -> _StrColumn:
+        col = self.columns[name]
+        if col.kind != STR:
+            raise TypeError(f"{name}: ожидается str-колонка")
+        return col
+
+    def _num_data(self, name: str) -> array:
+        col = self.columns[name]
+        if col.kind == STR:
+            raise TypeError(f"{name}: ожидается числовая колонка")
+        return col.data
+
+    # ---------------- filters ----------------
+    def mask_eq(self, name: str, value: Any) -> bytearray:
+        col = self.columns[name]
+        if col.kind == STR:
+            code = col.index.get(str(value)) if value is not None else 0
+            if code is None:
+                return bytearray(len(col))
+            return bytearray(map(code.__eq__, col.codes))
+        return self.mask_cmp(name, "==", value)
+
+    def mask_in(self, name: str, values: Iterable[Any]) -> bytearray:
+        col = self._str_column(name)
+        codes = {col.index[str(v)] for v in values if str(v) in col.index}
+        return bytearray(map(codes.__contains__, col.codes))
+
+    def mask_cmp(self, name: str, op: str, value: float) -> bytearray:
+        data = self._num_data(name)
+        fn = _CMP[op]
+        if self.columns[name].kind == INT:
+            # one pass; comparing, then masking with mask_not_null, takes two and is slower
+            return bytearray(x != INT_NULL and fn(x, value) for x in data)
+        # NaN compares False with everything except "!="
+        return bytearray(map(fn, data, repeat(value, len(data))))
+
+    def mask_not_null(self, name: str) -> bytearray:
+        col = self.columns[name]
+        if col.kind == STR:
+            return bytearray(map(bool, col.codes))
+        if col.kind == INT:
+            return bytearray(map(INT_NULL.__ne__, col.data))
+        return bytearray(map(operator.eq, col.data, col.data))
+
+    @staticmethod
+    def mask_and(a: bytearray, b: bytearray) -> bytearray:
+        return bytearray(map(operator.and_, a, b))
+
+    @staticmethod
+    def mask_or(a: bytearray, b: bytearray) -> bytearray:
+        return bytearray(map(operator.or_, a, b))
+
+    @staticmethod
+    def mask_not(a: bytearray) -> bytearray:
+        return bytearray(map((1).__xor__, a))
+
+    def filter(self, mask: bytearray) -> "ColumnStore":
+        out = ColumnStore(self.schema)
+        for name, col in self.columns.items():
+            dst = out.columns[name]
+            if col.kind == STR:
+                dst.values = list(col.values)
+                dst.index = dict(col.index)
+                dst.codes = array("I", compress(col.codes, mask))
+            else:
+                dst.data = array(col.data.typecode, compress(col.data, mask))
+        out._rows = sum(mask)
+        return out
+
+    # ---------------- aggregates ----------------
+    def count(self, mask: bytearray | None = None) -> int:
+        return self._rows if mask is None else sum(mask)
+
+    def sum(self, name: str, mask: bytearray | None = None) -> float:
+        data = self._num_data(name)
+        values = data if mask is None else compress(data, mask)
+        if self.columns[name].kind == INT:
+            return sum(v for v in values if v != INT_NULL)
+        return math.fsum(v for v in values if v == v)
+
+    def group_count(self, key: str, mask: bytearray | None = None) -> Dict[str | None, int]:
+        col = self._str_column(key)
+        codes = col.codes if mask is None else compress(col.codes, mask)
+        counts = [0] * len(col.values)
+        for c in codes:
+            counts[c] += 1
+        return {col.values[c]: n for c, n in enumerate(counts) if n}
+
+    def group_sum(self, key: str, name: str, mask: bytearray | None = None) -> Dict[str | None, float]:
+        col = self._str_column(key)
+        data = self._num_data(name)
+        codes = col.codes
+        if mask is not None:
+            codes = compress(codes, mask)
+            data = compress(data, mask)
+        # a per-row loop: without numpy there is no array op for a scatter-add by group
+        null = INT_NULL if self.columns[name].kind == INT else None
+        sums = [0] * len(col.values)
+        seen = bytearray(len(col.values))
+        for c, v in zip(codes, data):
+            if v == null or v != v:
+                continue
+            sums[c] += v
+            seen[c] = 1
+        return {col.values[c]: s for c, s in enumerate(sums) if seen[c]}
+
+    def rate(self, key: str, mask: bytearray, base: bytearray | None = None) -> Dict[str | None, float]:
+        """Share of rows matching `mask` per group, e.g. refund rate per product."""
+        num = self.group_count(key, mask if base is None else self.mask_and(mask, base))
+        den = self.group_count(key, base)
+        return {g: num.get(g, 0) / n for g, n in den.items() if n}
+
+    # ---------------- persistence ----------------
+    def save(self, path: str):
+        """
+        Binary format: magic, uint32 header length, JSON header, raw column arrays.
+        """
+        header: Dict[str, Any] = {
+            "rows": self._rows,
+            "byteorder": sys.byteorder,
+            "schema": {k: list(v) for k, v in self.schema.items()},
+            "columns": {},
+        }
+        blobs: list[bytes] = []
+        for name, col in self.columns.items():
+            arr = col.codes if col.kind == STR else col.data
+            raw = arr.tobytes()
+            meta: Dict[str, Any] = {"typecode": arr.typecode, "nbytes": len(raw)}
+            if col.kind == STR:
+                meta["values"] = col.values[1:]
+            header["columns"][name] = meta
+            blobs.append(raw)
+
+        head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<I", len(head)))
+            f.write(head)
+            for raw in blobs:
+                f.write(raw)
+
+    @classmethod
+    def load(cls, path: str) -> "ColumnStore":
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path}: не файл ColumnStore")
+            (head_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(head_len).decode("utf-8"))
+            store = cls({k: tuple(v) for k, v in header["schema"].items()})
+            swap = header.get("byteorder") != sys.byteorder
+            for name, meta in header["columns"].items():
+                arr = array(meta["typecode"])
+                arr.frombytes(f.read(meta["nbytes"]))
+                if swap:
+                    arr.byteswap()
+                col = store.columns[name]
+                if col.kind == STR:
+                    col.codes = arr
+                    col.values = [None] + meta["values"]
+                    col.index = {v: i for i, v in enumerate(col.values) if i}
+                else:
+                    col.data = arr
+            store._rows = header["rows"]
+        return store
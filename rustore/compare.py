@@ -0,0 +1,163 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable
+import time
+
+from .deadline import Deadline
+from .json_diff import DiffEntry, json_diff
+from .methods import MethodDef
+
+ENVS = ("prod", "sandbox")
+
+# Fields expected to differ between two calls of the same request
+VOLATILE_FIELDS = (
+    "timestamp",
+    "requestId",
+    "traceId",
+    "date",
+    "serverTime",
+)
+
+
+@dataclass(frozen=True)
+class EnvResult:
+    env: str
+    status_code: int | None
+    body: Any
+    url: str | None
+    elapsed: float
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class CompareResult:
+    method_key: str
+    params: Dict[str, Any]
+    results: Dict[str, EnvResult]
+    diff: list[DiffEntry]
+
+    @property
+    def equal(self) -> bool:
+        return not self.diff and all(r.error is None for r in self.results.values())
+
+
+def comparable_methods(methods: Iterable[MethodDef]) -> list[MethodDef]:
+    return [m for m in methods if all((m.paths or {}).get(env) for env in ENVS)]
+
+
+def _call_env(
+    service,
+    method: MethodDef,
+    env: str,
+    params: Dict[str, Any],
+    deadline: Deadline | None = None,
+) -> EnvResult:
+    started = time.perf_counter()
+    try:
+        resp, url = service.call_method(
+            method,
+            env,
+            path_params=params.get("path") or {},
+            query_params=params.get("query") or {},
+            body=params.get("body"),
+            deadline=deadline,
+        )
+    except Exception as e:
+        return EnvResult(env, None, None, None, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+    try:
+        body = resp.json()
+    except ValueError:
+        body = resp.text
+    return EnvResult(env, resp.status_code, body, url, time.perf_counter() - started)
+
+
+def _diff(results: Dict[str, EnvResult], ignore: Iterable[str]) -> list[DiffEntry]:
+    a, b = (results[env] for env in ENVS)
+    left = {"status": a.status_code, "error": a.error, "body": a.body}
+    right = {"status": b.status_code, "error": b.error, "body": b.body}
+    return json_diff(left, right, ignore=ignore)
+
+
+def compare_envs(
+    service,
+    method: MethodDef,
+    *,
+    path_params: Dict[str, Any],
+    query_params: Dict[str, Any],
+    body: Dict[str, Any] | None = None,
+    ignore: Iterable[str] = VOLATILE_FIELDS,
+    pool: ThreadPoolExecutor | None = None,
+    deadline: Deadline | None = None,
+) -> CompareResult:
+    """
+    Sends the same call to prod and sandbox at the same time and diffs
+    status + JSON body structurally, skipping volatile fields.
+    `service` is RuStoreService or AccountRegistry.
+    """
+    params = {"path": path_params or {}, "query": query_params or {}, "body": body}
+    own_pool = pool is None
+    pool = pool or ThreadPoolExecutor(max_workers=len(ENVS), thread_name_prefix="rustore-compare")
+    try:
+        futures = {env: pool.submit(_call_env, service, method, env, params, deadline) for env in ENVS}
+        results = {env: f.result() for env, f in futures.items()}
+    finally:
+        if own_pool:
+            pool.shutdown(wait=False)
+    return CompareResult(method.key, params, results, _diff(results, ignore))
+
+
+def compare_batch(
+    service,
+    method: MethodDef,
+    param_name: str,
+    values: Iterable[Any],
+    *,
+    section: str = "path",
+    path_params: Dict[str, Any] | None = None,
+    query_params: Dict[str, Any] | None = None,
+    ignore: Iterable[str] = VOLATILE_FIELDS,
+    max_workers: int = 8,
+) -> list[CompareResult]:
+    """
+    compare_envs over a list of ids put into `section`.`param_name`;
+    all 2 x N calls share one pool, results keep the input order.
+    """
+    if section not in ("path", "query"):
+        raise ValueError(f"section должен быть path или query, получено '{section}'")
+
+    jobs = []
+    for v in values:
+        pp = dict(path_params or {})
+        qp = dict(query_params or {})
+        (pp if section == "path" else qp)[param_name] = v
+        jobs.append((pp, qp))
+
+    with ThreadPoolExecutor(max_workers=max(2, max_workers), thread_name_prefix="rustore-compare") as pool:
+        futures = [
+            {env: pool.submit(_call_env, service, method, env, {"path": pp, "query": qp, "body": None}) for env in ENVS}
+            for pp, qp in jobs
+        ]
+        out = []
+        for (pp, qp), fs in zip(jobs, futures):
+            results = {env: f.result() for env, f in fs.items()}
+            out.append(CompareResult(method.key, {"path": pp, "query": qp, "body": None}, results, _diff(results, ignore)))
+    return out
+
+
+def format_compare(result: CompareResult) -> str:
+    lines = [f"=== {result.method_key}: {'совпадает' if result.equal else 'различается'} ==="]
+    for env in ENVS:
+        r = result.results[env]
+        status = r.error if r.error else r.status_code
+        lines.append(f"{env}: {status}  {r.elapsed:.2f} с  {r.url or ''}")
+    if result.diff:
+        lines.append("")
+        lines.append("=== DIFF (prod -> sandbox) ===")
+        for d in result.diff:
+            if d.op == "changed":
+                lines.append(f"~ {d.path}: {d.old!r} -> {d.new!r}")
+            elif d.op == "added":
+                lines.append(f"+ {d.path}: {d.new!r}")
+            else:
+                lines.append(f"- {d.path}: {d.old!r}")
+    return "\n".join(lines)
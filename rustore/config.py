@@ -21,6 +21,7 @@ def get_settings() -> Settings:
     if not allow_insecure:
         if parsed.scheme != "https" or not parsed.netloc:
             raise RuntimeError("RUSTORE_BASE_URL должен быть https и содержать корректный хост")
-    if not s.key_id or not s.private_key_b64:
+    multi_account = bool(os.getenv("RUSTORE_ACCOUNTS", "").strip())
+    if not multi_account and (not s.key_id or not s.private_key_b64):
         raise RuntimeError("Не заданы RUSTORE_KEY_ID / RUSTORE_PRIVATE_KEY_B64 в .env")
     return s
@@ -4,8 +4,10 @@ from Crypto.PublicKey import RSA
 from Crypto.Signature import pkcs1_15
 from Crypto.Hash import SHA512
 
-def iso_timestamp_with_ms_utc() -> str:
-    return dt.datetime.now(dt.timezone.utc).isoformat(timespec="milliseconds")
+def iso_timestamp_with_ms_utc(epoch: float | None = None) -> str:
+    if epoch is None:
+        return dt.datetime.now(dt.timezone.utc).isoformat(timespec="milliseconds")
+    return dt.datetime.fromtimestamp(epoch, dt.timezone.utc).isoformat(timespec="milliseconds")
 
 def generate_signature_b64(key_id: str, private_key_b64: str, timestamp: str) -> str:
     private_key_der = base64.b64decode(private_key_b64)
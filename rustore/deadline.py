@@ -0,0 +1,44 @@
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's overall time budget ran out (not a single attempt's HTTP timeout)."""
+
+
+class Deadline:
+    """
+    Absolute point in time (monotonic) shared by everything a call does:
+    token refresh, each retry attempt, backoff sleeps, every page.
+    Each step gets min(its own timeout, remaining()).
+    """
+
+    __slots__ = ("expires_at", "seconds")
+
+    def __init__(self, seconds: float):
+        self.seconds = float(seconds)
+        self.expires_at = time.monotonic() + self.seconds
+
+    @classmethod
+    def after(cls, seconds: float | None) -> "Deadline | None":
+        """None / 0 means no deadline."""
+        return cls(seconds) if seconds else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what: str = "вызов"):
+        if self.expired:
+            raise DeadlineExceeded(f"Истёк дедлайн {self.seconds:g} с ({what})")
+
+    def timeout(self, cap: float, what: str = "вызов") -> float:
+        """Timeout for the next blocking step; raises DeadlineExceeded if nothing is left."""
+        self.check(what)
+        return min(float(cap), self.remaining())
+
+
+def step_timeout(deadline: Deadline | None, cap: float, what: str = "вызов") -> float:
+    return cap if deadline is None else deadline.timeout(cap, what)
@@ -0,0 +1,144 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+import itertools
+import threading
+import time
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timeout"
+
+FINISHED = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+@dataclass
+class RequestHandle:
+    id: int
+    label: str
+    timeout: float | None
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float | None = None
+    finished_at: float | None = None
+    status: str = QUEUED
+    result: Any = None
+    error: BaseException | None = None
+    future: Future | None = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+
+class RequestExecutor:
+    """
+    Bounded pool for API calls with in-flight tracking.
+
+    A running HTTP call can't be interrupted, so cancel / timeout only mark the
+    request finished and its late result is dropped; queued requests are
+    removed from the pool. `fn` gets the handle's cancel_event to stop early
+    (e.g. between pages). on_done is called only for requests that completed
+    on their own, cancel() / check_timeouts() report the rest to the caller.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rustore-req")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._handles: Dict[int, RequestHandle] = {}
+
+    def submit(
+        self,
+        fn: Callable[[threading.Event], Any],
+        *,
+        label: str = "",
+        timeout: float | None = None,
+        on_done: Callable[[RequestHandle], None] | None = None,
+    ) -> RequestHandle:
+        h = RequestHandle(id=next(self._ids), label=label, timeout=timeout or None)
+        with self._lock:
+            self._handles[h.id] = h
+
+        def run():
+            with self._lock:
+                if h.finished:
+                    return
+                h.status = RUNNING
+                h.started_at = time.monotonic()
+            try:
+                result = fn(h.cancel_event)
+                error = None
+            except BaseException as e:
+                result, error = None, e
+            if self._finish(h, DONE if error is None else FAILED, result=result, error=error) and on_done:
+                on_done(h)
+
+        h.future = self._pool.submit(run)
+        return h
+
+    def _finish(self, h: RequestHandle, status: str, *, result: Any = None, error: BaseException | None = None) -> bool:
+        with self._lock:
+            if h.finished:
+                return False
+            h.status = status
+            h.result = result
+            h.error = error
+            h.finished_at = time.monotonic()
+            if h.started_at is None:
+                h.started_at = h.finished_at
+            return True
+
+    def cancel(self, request_id: int) -> bool:
+        h = self.get(request_id)
+        if h is None:
+            return False
+        h.cancel_event.set()
+        if not self._finish(h, CANCELLED, error=RequestCancelled("Запрос отменён")):
+            return False
+        if h.future is not None:
+            h.future.cancel()
+        return True
+
+    def check_timeouts(self) -> list[RequestHandle]:
+        """Marks running requests past their timeout; returns the ones that just timed out."""
+        expired = []
+        for h in self.in_flight():
+            if h.timeout and h.status == RUNNING and h.elapsed > h.timeout:
+                h.cancel_event.set()
+                if self._finish(h, TIMED_OUT, error=TimeoutError(f"Превышен таймаут {h.timeout:g} с")):
+                    expired.append(h)
+        return expired
+
+    def get(self, request_id: int) -> RequestHandle | None:
+        with self._lock:
+            return self._handles.get(request_id)
+
+    def forget(self, request_id: int):
+        with self._lock:
+            h = self._handles.get(request_id)
+            if h is not None and h.finished:
+                del self._handles[request_id]
+
+    def in_flight(self) -> list[RequestHandle]:
+        with self._lock:
+            return [h for h in self._handles.values() if not h.finished]
+
+    def shutdown(self, wait: bool = False):
+        for h in self.in_flight():
+            self.cancel(h.id)
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,252 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict
+import asyncio
+import os
+import threading
+import time
+
+import requests
+
+from .methods import MethodDef
+from .rate_limit import RateLimiter
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    methods: frozenset[str]            # ключи методов из methods.yaml (только GET)
+    percentile: float = 0.95           # задержка перед вторым запросом — этот перцентиль латентности
+    min_samples: int = 20              # пока замеров меньше — без хеджирования
+    min_delay: float = 0.05
+    window: int = 200                  # последних замеров на эндпоинт
+    budget_ratio: float = 0.1          # не больше 10% дополнительных запросов
+    budget_burst: float = 10.0
+    max_workers: int = 32
+
+    def applies(self, method: MethodDef) -> bool:
+        return method.http_method.upper() == "GET" and method.key in self.methods
+
+
+def load_hedge_policy() -> HedgePolicy | None:
+    """
+    RUSTORE_HEDGE_METHODS=invoice_v2,subscription_data_v4 turns hedging on for these methods;
+    RUSTORE_HEDGE_PERCENTILE, RUSTORE_HEDGE_BUDGET (доля дополнительных запросов).
+    """
+    methods = frozenset(x.strip() for x in os.getenv("RUSTORE_HEDGE_METHODS", "").split(",") if x.strip())
+    if not methods:
+        return None
+    d = HedgePolicy(methods=methods)
+    return HedgePolicy(
+        methods=methods,
+        percentile=float(os.getenv("RUSTORE_HEDGE_PERCENTILE", str(d.percentile))),
+        budget_ratio=float(os.getenv("RUSTORE_HEDGE_BUDGET", str(d.budget_ratio))),
+    )
+
+
+@dataclass(frozen=True)
+class HedgeStats:
+    requests: int
+    hedged: int
+    hedge_wins: int
+
+
+class LatencyTracker:
+    """Recent latencies per endpoint key, for percentile lookups."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque[float]] = {}
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            d = self._samples.get(key)
+            if d is None:
+                d = self._samples[key] = deque(maxlen=self.window)
+            d.append(seconds)
+
+    def percentile(self, key: str, p: float, *, min_samples: int = 1) -> float | None:
+        with self._lock:
+            d = self._samples.get(key)
+            if d is None or len(d) < max(1, min_samples):
+                return None
+            ordered = sorted(d)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class HedgeBudget:
+    """Every request earns `ratio` of a token, every hedge spends one."""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+def _close_response(f: Future):
+    if not f.cancelled() and f.exception() is None:
+        f.result().close()
+
+
+def _usable(f) -> bool:
+    """A reply worth winning with while the other attempt may still do better."""
+    if f.exception() is not None:
+        return False
+    status = f.result().status_code
+    return status < 500 and status != 429
+
+
+def _fallback(finished: list):
+    """Neither attempt was usable: an error reply (the caller retries on its status) beats an exception."""
+    winner = next((f for f in finished if f.exception() is None), None)
+    if winner is None:
+        raise finished[-1].exception()
+    return winner
+
+
+class Hedger:
+    """
+    Sends a request and, if it hasn't answered within the endpoint's recent
+    `percentile` latency, sends an identical second one; the first reply that
+    is not an exception, 5xx or 429 wins and the other is closed when it
+    arrives. The delay counts from when the primary actually went out, not
+    from when it was queued in the pool. Extra requests are
+    capped by HedgeBudget and by the account's rate limit (never waited for).
+    """
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self.latency = LatencyTracker(policy.window)
+        self.budget = HedgeBudget(policy.budget_ratio, policy.budget_burst)
+        self._pool = ThreadPoolExecutor(max_workers=policy.max_workers, thread_name_prefix="rustore-hedge")
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def delay(self, key: str) -> float | None:
+        p = self.latency.percentile(key, self.policy.percentile, min_samples=self.policy.min_samples)
+        return None if p is None else max(self.policy.min_delay, p)
+
+    def _timed(
+        self,
+        key: str,
+        fn: Callable[[], requests.Response],
+        started_event: threading.Event | None = None,
+    ) -> requests.Response:
+        if started_event is not None:
+            started_event.set()
+        started = time.monotonic()
+        resp = fn()
+        self.latency.record(key, time.monotonic() - started)
+        return resp
+
+    def send(
+        self,
+        key: str,
+        fn: Callable[[], requests.Response],
+        *,
+        limiter: RateLimiter | None = None,
+    ) -> requests.Response:
+        self.budget.deposit()
+        with self._lock:
+            self._requests += 1
+
+        started = threading.Event()
+        primary = self._pool.submit(self._timed, key, fn, started)
+        primary.add_done_callback(lambda _f: started.set())  # cancelled before it ran
+        delay = self.delay(key)
+        if delay is None:
+            return primary.result()
+        # time spent waiting for a free worker is not latency the samples know about
+        started.wait()
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        if not self.budget.try_spend() or (limiter is not None and not limiter.try_acquire()):
+            return primary.result()
+
+        with self._lock:
+            self._hedged += 1
+        hedge = self._pool.submit(self._timed, key, fn)
+        pending = {primary, hedge}
+        finished: list[Future] = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            finished.extend(done)
+            winner = next((f for f in done if _usable(f)), None)
+            if winner is not None:
+                break
+        else:
+            winner = _fallback(finished)
+        if winner is hedge:
+            with self._lock:
+                self._hedge_wins += 1
+        for f in {primary, hedge} - {winner}:
+            f.add_done_callback(_close_response)
+        return winner.result()
+
+    async def _timed_async(self, key: str, fn: Callable[[], Awaitable]):
+        started = time.monotonic()
+        resp = await fn()
+        self.latency.record(key, time.monotonic() - started)
+        return resp
+
+    async def send_async(self, key: str, fn: Callable[[], Awaitable], *, limiter: RateLimiter | None = None):
+        """send() for coroutines: both attempts are tasks on the caller's loop, the loser is cancelled."""
+        self.budget.deposit()
+        with self._lock:
+            self._requests += 1
+
+        primary = asyncio.ensure_future(self._timed_async(key, fn))
+        tasks = [primary]
+        try:
+            delay = self.delay(key)
+            if delay is not None:
+                await asyncio.wait([primary], timeout=delay)
+            if delay is None or primary.done():
+                return await primary
+            if not self.budget.try_spend() or (limiter is not None and not limiter.try_acquire()):
+                return await primary
+
+            with self._lock:
+                self._hedged += 1
+            hedge = asyncio.ensure_future(self._timed_async(key, fn))
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            finished: list[asyncio.Future] = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                finished.extend(done)
+                winner = next((f for f in done if _usable(f)), None)
+                if winner is not None:
+                    break
+            else:
+                winner = _fallback(finished)
+            if winner is hedge:
+                with self._lock:
+                    self._hedge_wins += 1
+            return winner.result()
+        finally:
+            # the loser, or both if the caller itself was cancelled
+            for t in tasks:
+                t.cancel()
+
+    def stats(self) -> HedgeStats:
+        with self._lock:
+            return HedgeStats(self._requests, self._hedged, self._hedge_wins)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from .resource import app_dir
+
+# Ids pulled out of params into indexed columns for fast lookup
+INDEXED_IDS = {
+    "invoiceId": "invoice_id",
+    "purchaseId": "purchase_id",
+    "appUserId": "app_user_id",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    method_key TEXT NOT NULL,
+    env TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status INTEGER,
+    latency_ms REAL,
+    url TEXT,
+    body BLOB,
+    invoice_id TEXT,
+    purchase_id TEXT,
+    app_user_id TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_calls_ts ON calls(ts);
+CREATE INDEX IF NOT EXISTS ix_calls_method ON calls(method_key, ts);
+CREATE INDEX IF NOT EXISTS ix_calls_invoice ON calls(invoice_id);
+CREATE INDEX IF NOT EXISTS ix_calls_purchase ON calls(purchase_id);
+CREATE INDEX IF NOT EXISTS ix_calls_app_user ON calls(app_user_id);
+"""
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    id: int
+    ts: float
+    method_key: str
+    env: str
+    params: Dict[str, Any]
+    status: int | None
+    latency_ms: float | None
+    url: str | None
+
+    @property
+    def path_params(self) -> Dict[str, Any]:
+        return self.params.get("path") or {}
+
+    @property
+    def query_params(self) -> Dict[str, Any]:
+        return self.params.get("query") or {}
+
+    @property
+    def body(self) -> Dict[str, Any] | None:
+        return self.params.get("body")
+
+
+def default_history_path() -> str:
+    return os.path.join(app_dir(), "history.sqlite3")
+
+
+def _extract_ids(params: Dict[str, Any]) -> Dict[str, str | None]:
+    found: Dict[str, str | None] = {col: None for col in INDEXED_IDS.values()}
+    for section in ("path", "query", "body"):
+        values = params.get(section) or {}
+        if not isinstance(values, dict):
+            continue
+        for name, col in INDEXED_IDS.items():
+            v = values.get(name)
+            if found[col] is None and v not in (None, ""):
+                found[col] = str(v)
+    return found
+
+
+class RequestHistory:
+    """
+    Local SQLite history of API calls.
+    Response bodies are stored zlib-compressed; invoiceId/purchaseId/appUserId
+    are indexed so lookups by id don't scan the whole table.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or default_history_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(
+        self,
+        method_key: str,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        status: int | None,
+        latency_ms: float | None,
+        url: str | None,
+        response_text: str | None,
+        ts: float | None = None,
+    ) -> int:
+        params = {"path": path_params or {}, "query": query_params or {}, "body": body}
+        ids = _extract_ids(params)
+        blob = zlib.compress((response_text or "").encode("utf-8"))
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO calls (ts, method_key, env, params, status, latency_ms, url, body,"
+                " invoice_id, purchase_id, app_user_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    ts if ts is not None else time.time(),
+                    method_key,
+                    env,
+                    json.dumps(params, ensure_ascii=False),
+                    status,
+                    latency_ms,
+                    url,
+                    blob,
+                    ids["invoice_id"],
+                    ids["purchase_id"],
+                    ids["app_user_id"],
+                ),
+            )
+            self._conn.commit()
+            return int(cur.lastrowid)
+
+    def search(self, text: str = "", *, method_key: str | None = None, limit: int = 200) -> list[HistoryEntry]:
+        """
+        Empty text -> latest calls.
+        Otherwise the text is matched exactly against indexed ids (fast path),
+        then as a prefix of method_key.
+        """
+        text = (text or "").strip()
+        where = []
+        args: list[Any] = []
+        if text:
+            # every OR branch hits an index: id columns by equality,
+            # method_key by prefix range (LIKE would force a full scan)
+            id_cols = list(INDEXED_IDS.values())
+            clauses = [f"{c} = ?" for c in id_cols] + ["(method_key >= ? AND method_key < ?)"]
+            where.append("(" + " OR ".join(clauses) + ")")
+            args.extend([text] * len(id_cols))
+            args.extend([text, text + "\uffff"])
+        if method_key:
+            where.append("method_key = ?")
+            args.append(method_key)
+
+        sql = "SELECT id, ts, method_key, env, params, status, latency_ms, url FROM calls"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        args.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [
+            HistoryEntry(
+                id=r[0],
+                ts=r[1],
+                method_key=r[2],
+                env=r[3],
+                params=json.loads(r[4]),
+                status=r[5],
+                latency_ms=r[6],
+                url=r[7],
+            )
+            for r in rows
+        ]
+
+    def response_text(self, entry_id: int) -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM calls WHERE id = ?", (entry_id,)).fetchone()
+        if not row or row[0] is None:
+            return ""
+        return zlib.decompress(row[0]).decode("utf-8")
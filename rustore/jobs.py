@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable
+
+from .circuit_breaker import CircuitOpenError
+from .deadline import Deadline
+from .methods import MethodDef
+from .validation import ValidationError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method_key TEXT NOT NULL,
+    env TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result_status INTEGER,
+    result_body BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs(status, lease_expires, id);
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# a call must finish this long before its lease runs out, so the job is never reclaimed mid-call
+LEASE_MARGIN_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class Job:
+    id: int
+    method_key: str
+    env: str
+    params: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_owner: str | None
+
+    @property
+    def path_params(self) -> Dict[str, Any]:
+        return self.params.get("path") or {}
+
+    @property
+    def query_params(self) -> Dict[str, Any]:
+        return self.params.get("query") or {}
+
+    @property
+    def body(self) -> Dict[str, Any] | None:
+        return self.params.get("body")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Durable job queue in a SQLite file.
+    Several processes (also on different hosts sharing the file) claim jobs
+    with time-limited leases; a job whose lease expired is claimed again.
+
+    wal=True is faster but only safe when all workers are on one machine;
+    the default rollback journal relies on file locks and works on shared storage.
+    """
+
+    def __init__(self, path: str, *, wal: bool = False, busy_timeout_ms: int = 30000):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode=" + ("WAL" if wal else "DELETE"))
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(
+        self,
+        method_key: str,
+        env: str,
+        *,
+        path_params: Dict[str, Any] | None = None,
+        query_params: Dict[str, Any] | None = None,
+        body: Dict[str, Any] | None = None,
+        max_attempts: int = 3,
+    ) -> int:
+        return self.enqueue_many([
+            {
+                "method": method_key,
+                "env": env,
+                "path": path_params or {},
+                "query": query_params or {},
+                "body": body,
+                "max_attempts": max_attempts,
+            }
+        ])[0]
+
+    def enqueue_many(self, jobs: Iterable[Dict[str, Any]]) -> list[int]:
+        """
+        jobs: dicts {"method", "env", "path", "query", "body", "max_attempts"?}
+        (the same shape as lines of a jobs .jsonl file).
+        """
+        now = time.time()
+        ids: list[int] = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for j in jobs:
+                    params = {"path": j.get("path") or {}, "query": j.get("query") or {}, "body": j.get("body")}
+                    cur = self._conn.execute(
+                        "INSERT INTO jobs (method_key, env, params, max_attempts, created_at, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            j["method"],
+                            j.get("env", "prod"),
+                            json.dumps(params, ensure_ascii=False),
+                            int(j.get("max_attempts", 3)),
+                            now,
+                            now,
+                        ),
+                    )
+                    ids.append(int(cur.lastrowid))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def claim(self, worker_id: str, *, lease_seconds: float = 120.0) -> Job | None:
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers
+            # can never select and claim the same row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # a job whose worker died on every attempt (e.g. the job crashes it) is not retried forever
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                    " WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                    (FAILED, "Аренда истекла, попытки исчерпаны", now, RUNNING, now),
+                )
+                row = self._conn.execute(
+                    "SELECT id, method_key, env, params, attempts, max_attempts FROM jobs"
+                    " WHERE status = ? OR (status = ? AND lease_expires < ? AND attempts < max_attempts)"
+                    " ORDER BY id LIMIT 1",
+                    (PENDING, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?,"
+                    " updated_at = ? WHERE id = ?",
+                    (RUNNING, worker_id, now + lease_seconds, now, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(
+            id=row[0],
+            method_key=row[1],
+            env=row[2],
+            params=json.loads(row[3]),
+            attempts=row[4] + 1,
+            max_attempts=row[5],
+            lease_owner=worker_id,
+        )
+
+    def extend_lease(self, job: Job, *, lease_seconds: float = 120.0) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + lease_seconds, now, job.id, RUNNING, job.lease_owner),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job: Job, *, status_code: int | None, body_text: str | None) -> bool:
+        """Returns False if the lease was lost (the job now belongs to another worker)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, result_status = ?, result_body = ?, error = NULL, lease_expires = NULL,"
+                " updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (
+                    DONE,
+                    status_code,
+                    zlib.compress((body_text or "").encode("utf-8")),
+                    time.time(),
+                    job.id,
+                    RUNNING,
+                    job.lease_owner,
+                ),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, job: Job, error: str, *, retry: bool = True) -> bool:
+        next_status = FAILED if (not retry or job.attempts >= job.max_attempts) else PENDING
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE id = ? AND status = ? AND lease_owner = ?",
+                (next_status, error, time.time(), job.id, RUNNING, job.lease_owner),
+            )
+        return cur.rowcount == 1
+
+    def release(self, job: Job) -> bool:
+        """Puts a claimed job back to pending without spending an attempt (it was never sent)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, lease_owner = NULL, lease_expires = NULL,"
+                " updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (PENDING, time.time(), job.id, RUNNING, job.lease_owner),
+            )
+        return cur.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def result(self, job_id: int) -> tuple[str, int | None, str, str | None] | None:
+        """(status, http status, response body, error) or None if no such job."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result_status, result_body, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        body = zlib.decompress(row[2]).decode("utf-8") if row[2] is not None else ""
+        return row[0], row[1], body, row[3]
+
+
+class JobWorker:
+    """
+    Pulls jobs from a JobQueue and runs them through RuStoreService
+    (routed by AccountRegistry). Several threads per process, any number of processes.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        registry,
+        methods: Iterable[MethodDef],
+        *,
+        worker_id: str | None = None,
+        concurrency: int = 4,
+        lease_seconds: float = 120.0,
+        poll_interval: float = 1.0,
+        logger: logging.Logger | None = None,
+    ):
+        self.queue = queue
+        self.registry = registry
+        self.methods = {m.key: m for m in methods}
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, *, exit_when_empty: bool = False):
+        threads = [
+            threading.Thread(
+                target=self._loop,
+                args=(f"{self.worker_id}:{i}", exit_when_empty),
+                name=f"rustore-worker-{i}",
+                daemon=True,
+            )
+            for i in range(self.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            for t in threads:
+                t.join()
+
+    def _loop(self, worker_id: str, exit_when_empty: bool):
+        while not self._stop.is_set():
+            job = self.queue.claim(worker_id, lease_seconds=self.lease_seconds)
+            if job is None:
+                if exit_when_empty:
+                    return
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+
+    def run_job(self, job: Job):
+        method = self.methods.get(job.method_key)
+        if method is None:
+            self.queue.fail(job, f"Метод '{job.method_key}' не найден в methods.yaml", retry=False)
+            return
+
+        # retries and re-auth must not outlive the lease: another worker would resend the job
+        margin = min(LEASE_MARGIN_SECONDS, self.lease_seconds / 4)
+        try:
+            resp, url = self.registry.call_method(
+                method,
+                job.env,
+                path_params=job.path_params,
+                query_params=job.query_params,
+                body=job.body,
+                deadline=Deadline(self.lease_seconds - margin),
+            )
+        except CircuitOpenError as e:
+            # the endpoint is down: hand the job back and let this thread wait instead of burning attempts
+            if self.logger:
+                self.logger.warning("[WORKER] job=%s postponed: %s", job.id, e)
+            self.queue.release(job)
+            self._stop.wait(min(max(e.retry_after, self.poll_interval), self.lease_seconds))
+            return
+        except Exception as e:
+            if self.logger:
+                self.logger.warning("[WORKER][ERROR] job=%s %s: %s", job.id, type(e).__name__, e)
+            # a malformed job fails the same way on every attempt
+            self.queue.fail(job, f"{type(e).__name__}: {e}", retry=not isinstance(e, ValidationError))
+            return
+
+        if self.logger:
+            self.logger.info("[WORKER] job=%s %s %s", job.id, resp.status_code, url)
+        if not self.queue.complete(job, status_code=resp.status_code, body_text=resp.text):
+            if self.logger:
+                self.logger.warning("[WORKER] job=%s lease lost, result dropped", job.id)
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class DiffEntry:
+    path: str
+    op: str
+    old: Any = None
+    new: Any = None
+
+    def as_dict(self) -> dict:
+        return {"path": self.path, "op": self.op, "old": self.old, "new": self.new}
+
+
+def _join(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+def json_diff(old: Any, new: Any, *, ignore: Iterable[str] = ()) -> list[DiffEntry]:
+    """
+    Structural diff of two parsed JSON values.
+    Keys listed in `ignore` are skipped at any depth (volatile fields like timestamps).
+    Lists are compared by position.
+    """
+    ignore_set = frozenset(k.lower() for k in ignore)
+    out: list[DiffEntry] = []
+    _diff(old, new, "", ignore_set, out)
+    return out
+
+
+def _diff(old: Any, new: Any, path: str, ignore: frozenset[str], out: list[DiffEntry]):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in list(old.keys()) + [k for k in new.keys() if k not in old]:
+            if str(key).lower() in ignore:
+                continue
+            o = old.get(key, _MISSING)
+            n = new.get(key, _MISSING)
+            p = _join(path, key)
+            if o is _MISSING:
+                out.append(DiffEntry(p, ADDED, new=n))
+            elif n is _MISSING:
+                out.append(DiffEntry(p, REMOVED, old=o))
+            else:
+                _diff(o, n, p, ignore, out)
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        for i in range(max(len(old), len(new))):
+            p = _join(path, i)
+            if i >= len(old):
+                out.append(DiffEntry(p, ADDED, new=new[i]))
+            elif i >= len(new):
+                out.append(DiffEntry(p, REMOVED, old=old[i]))
+            else:
+                _diff(old[i], new[i], p, ignore, out)
+        return
+
+    if old != new or type(old) is not type(new):
+        out.append(DiffEntry(path, CHANGED, old=old, new=new))
@@ -0,0 +1,363 @@
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable
+import itertools
+import logging
+import random
+import threading
+import time
+
+from .deadline import Deadline
+from .methods import MethodDef
+
+
+@dataclass(frozen=True)
+class LoadRequest:
+    method: MethodDef
+    env: str = "sandbox"
+    path_params: Dict[str, Any] = field(default_factory=dict)
+    query_params: Dict[str, Any] = field(default_factory=dict)
+    body: Dict[str, Any] | None = None
+    weight: float = 1.0
+
+
+def scenario_from_dicts(rows: Iterable[Dict[str, Any]], methods: Dict[str, MethodDef]) -> list[LoadRequest]:
+    """
+    rows: {"method", "env", "path", "query", "body", "weight"?}
+    (the same shape as lines of a jobs .jsonl file).
+    """
+    out = []
+    for i, r in enumerate(rows):
+        m = methods.get(r.get("method"))
+        if m is None:
+            raise ValueError(f"строка {i + 1}: метод '{r.get('method')}' не найден в methods.yaml")
+        out.append(
+            LoadRequest(
+                method=m,
+                env=r.get("env", "sandbox"),
+                path_params=r.get("path") or {},
+                query_params=r.get("query") or {},
+                body=r.get("body"),
+                weight=float(r.get("weight", 1.0)),
+            )
+        )
+    return out
+
+
+def _percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+@dataclass(frozen=True)
+class SecondStats:
+    second: int
+    sent: int
+    done: int
+    errors: int
+    throttled: int
+    p50_ms: float
+    p99_ms: float
+    auth_refreshes: int
+
+
+@dataclass(frozen=True)
+class LoadReport:
+    mode: str
+    target: float
+    duration: float
+    sent: int
+    done: int
+    dropped: int               # due but never sent: backlog full, or cancelled by stop()
+    errors: int
+    throttled: int
+    statuses: Dict[str, int]
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    auth_refreshes: int
+    timeline: list[SecondStats]
+
+    @property
+    def throughput(self) -> float:
+        return self.done / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.done if self.done else 0.0
+
+    @property
+    def throttle_rate(self) -> float:
+        return self.throttled / self.done if self.done else 0.0
+
+
+class _Bucket:
+    __slots__ = ("sent", "done", "errors", "throttled", "latencies", "auth_refreshes")
+
+    def __init__(self):
+        self.sent = 0
+        self.done = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latencies = array("d")
+        self.auth_refreshes = 0
+
+
+def _token_managers(service) -> list:
+    if hasattr(service, "contexts"):
+        return [ctx.tm for ctx in service.contexts()]
+    client = getattr(service, "client", None)
+    return [client.tm] if client is not None and hasattr(client, "tm") else []
+
+
+class LoadGenerator:
+    """
+    Drives RuStoreService (or AccountRegistry) with a weighted mix of requests.
+
+    rps > 0 — open loop: request i is due at start + i / rps regardless of how
+    earlier ones are doing, and its latency is measured from that due time, so
+    queueing behind slow calls shows up in the percentiles instead of silently
+    lowering the send rate (coordinated omission). `concurrency` only caps the
+    calls in flight. Requests due while all of them are busy wait in a backlog;
+    `max_backlog` > 0 drops (and reports) the ones beyond it, and stop() cancels
+    the backlog instead of waiting it out. rps <= 0 — closed loop: `concurrency`
+    workers call back to back.
+    """
+
+    def __init__(
+        self,
+        service,
+        requests_mix: list[LoadRequest],
+        *,
+        rps: float = 0.0,
+        concurrency: int = 16,
+        duration: float = 30.0,
+        timeout: float | None = None,
+        poisson: bool = False,
+        max_backlog: int = 0,
+        on_second=None,
+        logger: logging.Logger | None = None,
+    ):
+        if not requests_mix:
+            raise ValueError("Пустой сценарий нагрузки")
+        self.service = service
+        self.mix = requests_mix
+        self.rps = float(rps)
+        self.concurrency = max(1, int(concurrency))
+        self.duration = float(duration)
+        self.timeout = timeout
+        self.poisson = poisson
+        self.max_backlog = max(0, int(max_backlog))
+        self.on_second = on_second
+        self.logger = logger
+        self._weights = list(itertools.accumulate(r.weight for r in requests_mix))
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, _Bucket] = {}
+        self._statuses: Dict[str, int] = {}
+        self._all = array("d")
+        self._queued = 0       # submitted to the pool, not started yet
+        self._pending = 0      # submitted, not finished
+        self._dropped = 0
+        self._stop = threading.Event()
+        self._started = 0.0
+
+    def _pick(self, rnd: random.Random) -> LoadRequest:
+        if len(self.mix) == 1:
+            return self.mix[0]
+        x = rnd.random() * self._weights[-1]
+        for req, w in zip(self.mix, self._weights):
+            if x < w:
+                return req
+        return self.mix[-1]
+
+    def _bucket(self, t: float) -> _Bucket:
+        sec = max(0, int(t - self._started))
+        b = self._buckets.get(sec)
+        if b is None:
+            b = self._buckets[sec] = _Bucket()
+        return b
+
+    def _fire(self, req: LoadRequest, due: float):
+        status = None
+        try:
+            resp, _url = self.service.call_method(
+                req.method,
+                req.env,
+                path_params=req.path_params,
+                query_params=req.query_params,
+                body=req.body,
+                deadline=Deadline.after(self.timeout),
+            )
+            status = resp.status_code
+            key = str(status)
+        except Exception as e:
+            key = type(e).__name__
+        now = time.monotonic()
+        latency_ms = (now - due) * 1000
+        with self._lock:
+            b = self._bucket(now)
+            b.done += 1
+            b.latencies.append(latency_ms)
+            self._all.append(latency_ms)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+            # 429 is counted on its own; any other non-2xx (a bad scenario's 400/404 too) is an error
+            if status == 429:
+                b.throttled += 1
+            elif status is None or not 200 <= status < 300:
+                b.errors += 1
+
+    def _fire_queued(self, req: LoadRequest, due: float):
+        with self._lock:
+            self._queued -= 1
+            self._bucket(due).sent += 1
+        try:
+            self._fire(req, due)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _open_loop(self, pool: ThreadPoolExecutor, rnd: random.Random):
+        end = self._started + self.duration
+        due = self._started
+        while due < end and not self._stop.is_set():
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            req = self._pick(rnd)
+            with self._lock:
+                full = self.max_backlog and self._queued >= self.max_backlog
+                if full:
+                    self._dropped += 1
+                else:
+                    self._queued += 1
+                    self._pending += 1
+            if not full:
+                pool.submit(self._fire_queued, req, due)
+            due += rnd.expovariate(self.rps) if self.poisson else 1.0 / self.rps
+
+    def _closed_loop_worker(self, seed: int):
+        rnd = random.Random(seed)
+        end = self._started + self.duration
+        while time.monotonic() < end and not self._stop.is_set():
+            req = self._pick(rnd)
+            now = time.monotonic()
+            with self._lock:
+                self._bucket(now).sent += 1
+            self._fire(req, now)
+
+    def _watch_seconds(self):
+        tms = _token_managers(self.service)
+        last_refreshes = sum(tm.refreshes for tm in tms)
+        sec = 0
+        while not self._stop.wait(max(0.0, self._started + sec + 1 - time.monotonic())):
+            refreshes = sum(tm.refreshes for tm in tms)
+            with self._lock:
+                b = self._buckets.setdefault(sec, _Bucket())
+                b.auth_refreshes += refreshes - last_refreshes
+                stats = self._second_stats(sec, b)
+            last_refreshes = refreshes
+            if self.on_second:
+                self.on_second(stats)
+            sec += 1
+
+    @staticmethod
+    def _second_stats(sec: int, b: _Bucket) -> SecondStats:
+        lat = sorted(b.latencies)
+        return SecondStats(
+            second=sec,
+            sent=b.sent,
+            done=b.done,
+            errors=b.errors,
+            throttled=b.throttled,
+            p50_ms=_percentile(lat, 0.50),
+            p99_ms=_percentile(lat, 0.99),
+            auth_refreshes=b.auth_refreshes,
+        )
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self) -> LoadReport:
+        tms = _token_managers(self.service)
+        refreshes_before = sum(tm.refreshes for tm in tms)
+        self._started = time.monotonic()
+        watcher = threading.Thread(target=self._watch_seconds, name="rustore-load-stats", daemon=True)
+        watcher.start()
+
+        rnd = random.Random(1)
+        if self.rps > 0:
+            pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="rustore-load")
+            try:
+                self._open_loop(pool, rnd)
+                # requests due inside the window are still sent after it, unless stop() cuts that short
+                while self._pending and not self._stop.wait(0.1):
+                    pass
+            finally:
+                # stop() or Ctrl-C: the queued backlog is cancelled (reported as dropped); calls
+                # already in flight finish within their own timeout
+                pool.shutdown(wait=True, cancel_futures=True)
+                with self._lock:
+                    self._dropped += self._queued
+                    self._queued = self._pending = 0
+            mode = "open-loop"
+        else:
+            workers = [
+                threading.Thread(target=self._closed_loop_worker, args=(i,), name=f"rustore-load-{i}", daemon=True)
+                for i in range(self.concurrency)
+            ]
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            mode = "closed-loop"
+
+        elapsed = time.monotonic() - self._started
+        self._stop.set()
+        watcher.join()
+
+        with self._lock:
+            lat = sorted(self._all)
+            timeline = [self._second_stats(sec, self._buckets[sec]) for sec in sorted(self._buckets)]
+            statuses = dict(sorted(self._statuses.items()))
+        return LoadReport(
+            mode=mode,
+            target=self.rps if self.rps > 0 else float(self.concurrency),
+            duration=elapsed,
+            sent=sum(s.sent for s in timeline),
+            done=len(lat),
+            dropped=self._dropped,
+            errors=sum(s.errors for s in timeline),
+            throttled=sum(s.throttled for s in timeline),
+            statuses=statuses,
+            p50_ms=_percentile(lat, 0.50),
+            p90_ms=_percentile(lat, 0.90),
+            p99_ms=_percentile(lat, 0.99),
+            max_ms=lat[-1] if lat else 0.0,
+            auth_refreshes=sum(tm.refreshes for tm in tms) - refreshes_before,
+            timeline=timeline,
+        )
+
+
+def format_second(s: SecondStats) -> str:
+    return (
+        f"{s.second:>5}s  sent {s.sent:>5}  done {s.done:>5}  err {s.errors:>4}  429 {s.throttled:>4}"
+        f"  p50 {s.p50_ms:>8.1f} ms  p99 {s.p99_ms:>8.1f} ms  auth {s.auth_refreshes}"
+    )
+
+
+def format_report(r: LoadReport) -> str:
+    target = f"{r.target:g} rps" if r.mode == "open-loop" else f"{r.target:g} workers"
+    lines = [
+        f"=== Load test: {r.mode}, {target}, {r.duration:.1f} s ===",
+        f"sent {r.sent}, done {r.done}, dropped {r.dropped}, throughput {r.throughput:.1f} rps",
+        f"errors {r.errors} ({r.error_rate:.2%}), 429 {r.throttled} ({r.throttle_rate:.2%}), auth refreshes {r.auth_refreshes}",
+        f"latency ms: p50 {r.p50_ms:.1f}  p90 {r.p90_ms:.1f}  p99 {r.p99_ms:.1f}  max {r.max_ms:.1f}",
+        "statuses: " + ", ".join(f"{k}={v}" for k, v in r.statuses.items()),
+        "",
+        "=== Per second ===",
+    ]
+    lines += [format_second(s) for s in r.timeline]
+    return "\n".join(lines)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict
 import yaml
 
@@ -13,6 +13,7 @@ class MethodDef:
     http_method: str
     paths: Dict[str, str]                 # prod/sandbox
     params: Dict[str, Dict[str, Any]]     # path/query/body
+    relations: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # related method -> param sources (see rustore/prefetch.py)
 
 def load_all(path: str = "methods.yaml") -> Dict[str, Any]:
     real_path = external_or_embedded(path)
@@ -34,5 +35,6 @@ def list_methods(cfg: Dict[str, Any]) -> list[MethodDef]:
                 http_method=mv.get("http_method", "GET").upper(),
                 paths=mv.get("paths", {}) or {},
                 params=mv.get("params", {"path": {}, "query": {}, "body": {}}) or {},
+                relations=mv.get("relations", {}) or {},
             ))
     return out
\ No newline at end of file
@@ -0,0 +1,219 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator
+import datetime as dt
+import json
+
+import yaml
+
+from .pagination import page_items
+from .resource import external_or_embedded
+
+_UNSET = object()
+
+
+def _to_str(v: Any) -> str:
+    return v if isinstance(v, str) else str(v)
+
+
+def _to_int(v: Any) -> int:
+    if isinstance(v, bool):
+        raise ValueError(f"ожидается int, получено {v!r}")
+    return int(v)
+
+
+def _to_bool(v: Any) -> bool:
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, str) and v.lower() in ("true", "false"):
+        return v.lower() == "true"
+    raise ValueError(f"ожидается bool, получено {v!r}")
+
+
+def _to_datetime(v: Any) -> dt.datetime:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return _millis(v)
+    parsed = dt.datetime.fromisoformat(str(v).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt.timezone.utc)
+
+
+def _millis(v: Any) -> dt.datetime:
+    return dt.datetime.fromtimestamp(int(v) / 1000, tz=dt.timezone.utc)
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "str": _to_str,
+    "int": _to_int,
+    "float": float,
+    "bool": _to_bool,
+    "datetime": _to_datetime,
+    "millis": _millis,
+    "json": lambda v: v,
+}
+
+
+class ModelDecodeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    name: str
+    type_name: str
+    source: tuple[str, ...]
+    convert: Callable[[Any], Any]
+
+
+def _get_path(obj: Any, parts: tuple[str, ...]) -> Any:
+    cur = obj
+    for part in parts:
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(part)
+    return cur
+
+
+class _Field:
+    """Descriptor: decodes the whole record on first access, then reads its slot."""
+
+    __slots__ = ("slot",)
+
+    def __init__(self, slot: str):
+        self.slot = slot
+
+    def __get__(self, rec, owner):
+        if rec is None:
+            return self
+        value = getattr(rec, self.slot, _UNSET)
+        if value is _UNSET:
+            rec._decode()
+            value = getattr(rec, self.slot)
+        return value
+
+
+class Record:
+    """
+    Base of generated models. An instance holds only the compact JSON bytes
+    of its object; fields are decoded and type-converted on first access into
+    __slots__, so no per-record dict is ever kept.
+    """
+
+    __slots__ = ("_raw",)
+    _fields: tuple[FieldSpec, ...] = ()
+
+    def __init__(self, raw: bytes):
+        self._raw = raw
+
+    @classmethod
+    def from_obj(cls, obj: Any) -> "Record":
+        return cls(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    @property
+    def raw(self) -> bytes:
+        return self._raw
+
+    def _decode(self):
+        obj = json.loads(self._raw)
+        for f in self._fields:
+            v = _get_path(obj, f.source)
+            if v is not None:
+                try:
+                    v = f.convert(v)
+                except (TypeError, ValueError) as e:
+                    raise ModelDecodeError(f"{type(self).__name__}.{f.name}: {e}") from e
+            object.__setattr__(self, "_v_" + f.name, v)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in self._fields}
+
+    def __setattr__(self, name, value):
+        if name != "_raw":
+            raise AttributeError(f"{type(self).__name__} is read-only")
+        object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        shown = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items() if v is not None)
+        return f"{type(self).__name__}({shown})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._raw == other._raw
+
+    def __hash__(self):
+        return hash((type(self).__name__, self._raw))
+
+
+def make_model(name: str, fields: Dict[str, Dict[str, Any]]) -> type:
+    specs = []
+    for attr, meta in (fields or {}).items():
+        meta = meta or {}
+        t = (meta.get("type") or "str").strip()
+        if t not in CONVERTERS:
+            raise ValueError(f"models.yaml: {name}.{attr}: неизвестный тип '{t}'")
+        source = meta.get("source") or attr
+        specs.append(FieldSpec(attr, t, tuple(source.split(".")), CONVERTERS[t]))
+
+    namespace: Dict[str, Any] = {
+        "__slots__": tuple("_v_" + f.name for f in specs),
+        "_fields": tuple(specs),
+    }
+    for f in specs:
+        namespace[f.name] = _Field("_v_" + f.name)
+    return type(name, (Record,), namespace)
+
+
+@dataclass(frozen=True)
+class Binding:
+    model: type
+    root: tuple[str, ...] | None = None        # single object
+    items: str | None = None                   # list inside "body"
+
+
+class ModelRegistry:
+    def __init__(self, models: Dict[str, type], bindings: Dict[str, Binding]):
+        self.models = models
+        self.bindings = bindings
+
+    def __getitem__(self, name: str) -> type:
+        return self.models[name]
+
+    def model_for(self, method_key: str) -> type | None:
+        b = self.bindings.get(method_key)
+        return b.model if b else None
+
+    def decode_page(self, method_key: str, page: Any) -> list[Record]:
+        """Records from one parsed response (single object -> list of one)."""
+        b = self.bindings.get(method_key)
+        if b is None:
+            raise KeyError(f"Для метода '{method_key}' нет модели в models.yaml")
+        if b.items is not None:
+            return [b.model.from_obj(item) for item in page_items(page, b.items)]
+        obj = _get_path(page, b.root) if b.root else page
+        return [] if obj is None else [b.model.from_obj(obj)]
+
+    def decode_response(self, method_key: str, resp) -> list[Record]:
+        return self.decode_page(method_key, json.loads(resp.content))
+
+    def decode_pages(self, method_key: str, pages: Iterable[Any]) -> Iterator[Record]:
+        """Streams records from RuStoreService.iter_pages."""
+        for page in pages:
+            yield from self.decode_page(method_key, page)
+
+
+def load_models(path: str = "models.yaml") -> ModelRegistry:
+    real_path = external_or_embedded(path)
+    with open(real_path, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f) or {}
+
+    models: Dict[str, type] = {}
+    bindings: Dict[str, Binding] = {}
+    for name, mv in (cfg.get("models") or {}).items():
+        model = make_model(name, mv.get("fields") or {})
+        models[name] = model
+        for method_key, bv in (mv.get("methods") or {}).items():
+            bv = bv or {}
+            root = bv.get("root")
+            bindings[method_key] = Binding(
+                model=model,
+                root=tuple(root.split(".")) if root else None,
+                items=bv.get("items"),
+            )
+    return ModelRegistry(models, bindings)
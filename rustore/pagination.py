@@ -0,0 +1,87 @@
+from typing import Any, Dict
+
+from .methods import MethodDef
+
+# Query params the API uses for the continuation token, in order of preference
+TOKEN_PARAMS = ("continuationToken", "continuation")
+
+
+def token_param_for(method: MethodDef) -> str | None:
+    query_schema = (method.params or {}).get("query") or {}
+    for name in TOKEN_PARAMS:
+        if name in query_schema:
+            return name
+    return None
+
+
+def next_token(page: Any, token_param: str) -> str | None:
+    """Continuation token from a parsed page: body.<param> or top-level <param>."""
+    if not isinstance(page, dict):
+        return None
+    body = page.get("body")
+    for holder in (body, page):
+        if isinstance(holder, dict):
+            for name in (token_param, *TOKEN_PARAMS):
+                value = holder.get(name)
+                if value:
+                    return str(value)
+    return None
+
+
+def page_items(page: Any, items_key: str | None = None) -> list:
+    """
+    Records of a parsed page.
+    items_key: name of the list inside "body"; by default the first list found there.
+    """
+    if not isinstance(page, dict):
+        return []
+    body = page.get("body", page)
+    if isinstance(body, list):
+        return body
+    if not isinstance(body, dict):
+        return []
+    if items_key is not None:
+        return body.get(items_key) or []
+    for value in body.values():
+        if isinstance(value, list):
+            return value
+    return []
+
+
+def with_token(query_params: Dict[str, Any], token_param: str, token: str | None) -> Dict[str, Any]:
+    qp = dict(query_params or {})
+    if token:
+        qp[token_param] = token
+    return qp
+
+
+class PageCursor:
+    """
+    Page-token bookkeeping of one iter_pages run (sync or async): the query for
+    the next page, and whether there is one.
+    """
+
+    def __init__(self, method: MethodDef, query_params: Dict[str, Any], max_pages: int | None = None):
+        self.token_param = token_param_for(method)
+        self.query_params = query_params
+        self.token = (query_params or {}).get(self.token_param) if self.token_param else None
+        self.max_pages = max_pages
+        self.pages = 0
+        self._seen: set[str] = set()
+
+    def query(self) -> Dict[str, Any]:
+        if self.token_param is None:
+            return self.query_params
+        return with_token(self.query_params, self.token_param, self.token)
+
+    def advance(self, page: Any) -> bool:
+        """Records a fetched page; False when it was the last one (or the API repeats a token)."""
+        self.pages += 1
+        if self.token_param is None or (self.max_pages is not None and self.pages >= self.max_pages):
+            return False
+        token = next_token(page, self.token_param)
+        if not token or token in self._seen:
+            return False
+        self._seen.add(token)
+        self.token = token
+        return True
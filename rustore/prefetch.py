@@ -0,0 +1,376 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator
+import json
+import logging
+import os
+import threading
+import time
+
+from .deadline import Deadline
+from .methods import MethodDef
+from .validation import MethodValidator
+
+REQUEST_PREFIX = "request."
+ACCOUNT_PREFIX = "account."
+
+
+@dataclass(frozen=True)
+class Relation:
+    source: str                                  # метод, из ответа которого берутся значения
+    target: str                                  # связанный GET-метод
+    path: Dict[str, tuple[str, ...]]             # параметр -> пути-кандидаты
+    query: Dict[str, tuple[str, ...]]
+    each: str | None = None                      # список в ответе: запрос на каждый элемент
+    require: tuple[str, ...] = ()                # поля, без которых элемент пропускается
+
+
+def _sources(value: Any) -> tuple[str, ...]:
+    if isinstance(value, str):
+        return (value,)
+    if isinstance(value, (list, tuple)) and value and all(isinstance(v, str) for v in value):
+        return tuple(value)
+    raise ValueError(f"источник параметра должен быть строкой или списком строк: {value!r}")
+
+
+def parse_relations(methods: Dict[str, MethodDef]) -> Dict[str, list[Relation]]:
+    """relations from methods.yaml, checked: targets must exist and be GET (prefetch never changes state)."""
+    out: Dict[str, list[Relation]] = {}
+    for m in methods.values():
+        for target, spec in (m.relations or {}).items():
+            t = methods.get(target)
+            if t is None:
+                raise ValueError(f"{m.key}: связанный метод '{target}' не найден в methods.yaml")
+            if t.http_method.upper() != "GET":
+                raise ValueError(f"{m.key}: связанный метод '{target}' не GET, предзагрузка невозможна")
+            spec = spec or {}
+            out.setdefault(m.key, []).append(
+                Relation(
+                    source=m.key,
+                    target=target,
+                    path={k: _sources(v) for k, v in (spec.get("path") or {}).items()},
+                    query={k: _sources(v) for k, v in (spec.get("query") or {}).items()},
+                    each=spec.get("each"),
+                    require=_sources(spec["require"]) if spec.get("require") else (),
+                )
+            )
+    return out
+
+
+def dig(obj: Any, path: str) -> Any:
+    """Value at a dotted path; "" is the object itself, None if any step is missing."""
+    for part in path.split(".") if path else ():
+        if isinstance(obj, dict):
+            obj = obj.get(part)
+        elif isinstance(obj, list) and part.isdigit() and int(part) < len(obj):
+            obj = obj[int(part)]
+        else:
+            return None
+    return obj
+
+
+def _present(value: Any) -> bool:
+    return value not in (None, "", [], {})
+
+
+def _resolve(sources: tuple[str, ...], item: Any, request: Dict[str, Any], account: Dict[str, Any]) -> Any:
+    for src in sources:
+        if src.startswith(REQUEST_PREFIX):
+            value = request.get(src[len(REQUEST_PREFIX):])
+        elif src.startswith(ACCOUNT_PREFIX):
+            value = account.get(src[len(ACCOUNT_PREFIX):])
+        else:
+            value = dig(item, src)
+        if _present(value) and not isinstance(value, (dict, list)):
+            return value
+    return None
+
+
+def related_calls(
+    relation: Relation,
+    page: Any,
+    request: Dict[str, Any],
+    *,
+    max_fanout: int = 10,
+    account: Dict[str, Any] | None = None,
+) -> Iterator[tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    (path_params, query_params) for each complete set of values found in `page`.
+    account: values for "account.<name>" sources (see account_values).
+    """
+    if relation.each is not None:
+        items = dig(page, relation.each)
+        items = items[:max_fanout] if isinstance(items, list) else []
+    else:
+        items = [page]
+    for item in items:
+        if not all(_present(dig(item, f)) for f in relation.require):
+            continue
+        params = []
+        for section in (relation.path, relation.query):
+            values = {name: _resolve(srcs, item, request, account or {}) for name, srcs in section.items()}
+            params.append(values)
+        path_params, query_params = params
+        if any(v is None for v in path_params.values()):
+            continue
+        yield path_params, {k: v for k, v in query_params.items() if v is not None}
+
+
+def account_values(ctx) -> Dict[str, Any]:
+    """
+    "account.<name>" values for an AccountContext: packageName / appId when the
+    account has exactly one configured (with several there is no telling which).
+    """
+    acc = getattr(ctx, "account", None)
+    out: Dict[str, Any] = {}
+    for name, values in (("packageName", getattr(acc, "package_names", ())), ("appId", getattr(acc, "app_ids", ()))):
+        if len(values) == 1:
+            out[name] = next(iter(values))
+    return out
+
+
+def cache_key(method_key: str, env: str, path_params: Dict[str, Any], query_params: Dict[str, Any]) -> str:
+    # values from a response and from a form differ in type (123 vs "123") but build the same URL
+    query = {k: v for k, v in (query_params or {}).items() if v not in (None, "", [])}
+    canon = {
+        "path": {k: str(v) for k, v in (path_params or {}).items()},
+        "query": {k: [str(x) for x in v] if isinstance(v, list) else str(v) for k, v in query.items()},
+    }
+    return f"{method_key}|{env}|" + json.dumps(canon, sort_keys=True, ensure_ascii=False, default=str)
+
+
+@dataclass(frozen=True)
+class PrefetchPolicy:
+    ttl: float = 60.0          # сколько живёт предзагруженный ответ
+    depth: int = 2             # глубина цепочки: предзагруженный ответ тоже запускает свои связи
+    max_fanout: int = 10       # запросов на одну связь с each
+    max_entries: int = 500
+    max_workers: int = 4
+
+
+def load_prefetch_policy() -> PrefetchPolicy | None:
+    """RUSTORE_PREFETCH_TTL=60 turns prefetch on (0 / unset — off); RUSTORE_PREFETCH_DEPTH."""
+    ttl = float(os.getenv("RUSTORE_PREFETCH_TTL", "0") or 0)
+    if ttl <= 0:
+        return None
+    d = PrefetchPolicy()
+    return PrefetchPolicy(ttl=ttl, depth=int(os.getenv("RUSTORE_PREFETCH_DEPTH", str(d.depth))))
+
+
+@dataclass(frozen=True)
+class PrefetchStats:
+    prefetched: int
+    hits: int
+    misses: int
+    failed: int
+    expired: int
+
+
+class ResponseCache:
+    """
+    Prefetched responses by cache_key, each a Future (a lookup may still be
+    in flight). An entry is handed out once: the next real call for the same
+    request gets fresh data instead of the prefetched copy.
+    """
+
+    def __init__(self, *, ttl: float = 60.0, max_entries: int = 500):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, Future]] = OrderedDict()
+        self.expired = 0
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (stored_at, _f) = next(iter(self._entries.items()))
+            if now - stored_at <= self.ttl and len(self._entries) <= self.max_entries:
+                return
+            del self._entries[key]
+            self.expired += 1
+
+    def reserve(self, key: str) -> Future | None:
+        """A new pending entry, or None if `key` is already cached or in flight."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            if key in self._entries:
+                return None
+            f: Future = Future()
+            self._entries[key] = (now, f)
+            return f
+
+    def discard(self, key: str, f: Future):
+        with self._lock:
+            if key in self._entries and self._entries[key][1] is f:
+                del self._entries[key]
+
+    def take(self, key: str) -> Future | None:
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class Prefetcher:
+    """
+    Wraps RuStoreService / AccountRegistry (same call_method). After a call
+    returns, the related lookups declared in methods.yaml `relations` start in
+    the background and their responses go to ResponseCache; a later call for
+    the same method and params is answered from there (or waits for the
+    lookup already in flight instead of sending a duplicate). Prefetched
+    responses trigger their own relations, up to `policy.depth` steps.
+    Lookups go through the same service as the call they follow, so rate
+    limits and breakers apply to them as to any call. With AccountRegistry
+    that is the account the source call was routed to: related methods
+    often carry no appId / packageName to route by.
+    """
+
+    def __init__(
+        self,
+        service,
+        methods: Dict[str, MethodDef],
+        policy: PrefetchPolicy | None = None,
+        *,
+        logger: logging.Logger | None = None,
+    ):
+        self.service = service
+        self.methods = methods
+        self.policy = policy or PrefetchPolicy()
+        self.logger = logger
+        self.relations = parse_relations(methods)
+        self.cache = ResponseCache(ttl=self.policy.ttl, max_entries=self.policy.max_entries)
+        self._validators: Dict[str, MethodValidator] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.policy.max_workers, thread_name_prefix="rustore-prefetch")
+        self._lock = threading.Lock()
+        self._prefetched = 0
+        self._hits = 0
+        self._misses = 0
+        self._failed = 0
+
+    def _validator(self, method: MethodDef) -> MethodValidator:
+        v = self._validators.get(method.key)
+        if v is None:
+            v = self._validators[method.key] = MethodValidator(method)
+        return v
+
+    def _route(self, path_params: Dict[str, Any], query_params: Dict[str, Any]) -> tuple[Any, Dict[str, Any]]:
+        """(service to call, "account.<name>" values) for a call with these params."""
+        if hasattr(self.service, "route"):
+            ctx = self.service.route(path_params, query_params)
+            return ctx.service, account_values(ctx)
+        return self.service, {}
+
+    def call_method(
+        self,
+        method: MethodDef,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        deadline: Deadline | None = None,
+    ):
+        if method.http_method.upper() == "GET" and not body:
+            f = self.cache.take(cache_key(method.key, env, path_params, query_params))
+            if f is not None:
+                try:
+                    resp, url, service, account = f.result(timeout=deadline and deadline.remaining())
+                except Exception:
+                    resp = None
+                # failed, too slow or an error status: do the call ourselves
+                if resp is not None and 200 <= resp.status_code < 300:
+                    with self._lock:
+                        self._hits += 1
+                    if self.logger:
+                        self.logger.info("[API][PREFETCH] ответ из кэша: %s %s", method.key, url)
+                    self.prefetch(method, env, path_params, query_params, resp, service=service, account=account)
+                    return resp, url
+            with self._lock:
+                self._misses += 1
+
+        service, account = self._route(path_params, query_params)
+        resp, url = service.call_method(
+            method, env, path_params=path_params, query_params=query_params, body=body, deadline=deadline
+        )
+        self.prefetch(method, env, path_params, query_params, resp, service=service, account=account)
+        return resp, url
+
+    def prefetch(
+        self,
+        method: MethodDef,
+        env: str,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        resp,
+        *,
+        service=None,
+        account: Dict[str, Any] | None = None,
+        depth: int = 0,
+    ) -> int:
+        """
+        Starts the related lookups for a response; returns how many were started.
+        service / account: the ones the call went through (by default routed by its params).
+        """
+        relations = self.relations.get(method.key)
+        if not relations or depth >= self.policy.depth or not 200 <= resp.status_code < 300:
+            return 0
+        if service is None:
+            service, account = self._route(path_params, query_params)
+        try:
+            page = resp.json()
+        except ValueError:
+            return 0
+        request = {**(query_params or {}), **(path_params or {})}
+
+        started = 0
+        for rel in relations:
+            target = self.methods[rel.target]
+            if not (target.paths or {}).get(env):
+                continue
+            for pp, qp in related_calls(rel, page, request, max_fanout=self.policy.max_fanout, account=account):
+                if self._validator(target).errors(env, path_params=pp, query_params=qp, body=None):
+                    continue
+                key = cache_key(target.key, env, pp, qp)
+                f = self.cache.reserve(key)
+                if f is None:
+                    continue
+                self._pool.submit(self._fetch, service, account, target, env, pp, qp, key, f, depth + 1)
+                started += 1
+        if started:
+            with self._lock:
+                self._prefetched += started
+            if self.logger:
+                self.logger.info("[API][PREFETCH] %s -> %d связанных запросов", method.key, started)
+        return started
+
+    def _fetch(self, service, account, method: MethodDef, env: str, pp, qp, key: str, f: Future, depth: int):
+        try:
+            resp, url = service.call_method(method, env, path_params=pp, query_params=qp, body=None)
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            self.cache.discard(key, f)
+            f.set_exception(e)
+            return
+        if not 200 <= resp.status_code < 300:
+            # errors are not worth serving from cache; the real call will report them
+            with self._lock:
+                self._failed += 1
+            self.cache.discard(key, f)
+            # a caller already waiting on the future gets the reply and repeats the call itself
+            f.set_result((resp, url, service, account))
+            return
+        f.set_result((resp, url, service, account))
+        self.prefetch(method, env, pp, qp, resp, service=service, account=account, depth=depth)
+
+    def stats(self) -> PrefetchStats:
+        with self._lock:
+            return PrefetchStats(self._prefetched, self._hits, self._misses, self._failed, self.cache.expired)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,265 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# (subsystem, path fragments) — first match wins; paths are normalized to "/"
+SUBSYSTEM_RULES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("auth", ("rustore/token_manager.py", "rustore/crypto_sig.py", "/Crypto/")),
+    ("logging", ("rustore/logging_utils.py", "ui/logger_adapter.py", "/logging/")),
+    (
+        "parsing",
+        (
+            "/json/", "/yaml/", "rustore/models.py", "rustore/columnar.py", "rustore/pagination.py",
+            "rustore/validation.py", "rustore/json_diff.py", "rustore/methods.py",
+        ),
+    ),
+    (
+        "transport",
+        (
+            "/requests/", "/urllib3/", "/http/", "/ssl.py", "/socket.py", "/selectors.py", "/certifi/",
+            "/idna/", "/charset_normalizer/", "/httpx/", "/httpcore/", "/h11/", "rustore/api_client.py",
+            "rustore/async_client.py", "rustore/hedging.py", "rustore/prefetch.py", "rustore/circuit_breaker.py",
+            "rustore/rate_limit.py",
+        ),
+    ),
+    ("storage", ("/sqlite3/", "rustore/jobs.py", "rustore/history.py")),
+)
+
+# C functions show up in cProfile as "~" with only a name
+BUILTIN_RULES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("wait", ("_thread.lock", "time.sleep", "_thread.RLock", "select.", "selectors")),
+    ("transport", ("_ssl.", "_socket.", "'_ssl", "'_socket")),
+    ("parsing", ("_json.", "'_json", "json.", "yaml.")),
+    ("auth", ("Crypto", "_raw_api", "SHA512")),
+    ("storage", ("sqlite3", "zlib.")),
+)
+
+SUBSYSTEMS = ("auth", "transport", "wait", "logging", "parsing", "storage", "other")
+
+
+def classify(filename: str, name: str = "") -> str:
+    if filename == "~":
+        for subsystem, fragments in BUILTIN_RULES:
+            if any(f in name for f in fragments):
+                return subsystem
+        return "other"
+    path = filename.replace("\\", "/")
+    for subsystem, fragments in SUBSYSTEM_RULES:
+        if any(f in path for f in fragments):
+            return subsystem
+    return "other"
+
+
+@dataclass(frozen=True)
+class HotFunction:
+    subsystem: str
+    where: str
+    calls: int
+    self_seconds: float
+    cum_seconds: float
+
+
+@dataclass(frozen=True)
+class Allocator:
+    subsystem: str
+    where: str
+    size: int
+    count: int
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))).replace("\\", "/") + "/"
+_STDLIB_ROOT = os.path.dirname(os.__file__).replace("\\", "/") + "/"
+
+
+def _short_path(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    i = path.rfind("/site-packages/")
+    if i >= 0:
+        return path[i + len("/site-packages/"):]
+    for root in (_PROJECT_ROOT, _STDLIB_ROOT):
+        if path.startswith(root):
+            return path[len(root):]
+    return path
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+class Profiler:
+    """
+    cProfile plus tracemalloc. Memory is sampled every `snapshot_interval`
+    seconds and the snapshot at peak traced memory is kept, so short-lived
+    batch allocations are still visible after they have been freed.
+
+    On Python 3.12+ cProfile is built on sys.monitoring and sees every thread
+    (worker / pool threads included) between start() and stop(). On older
+    versions only the thread that called start() is profiled: a profiler
+    enabled inside a pool thread can only be disabled from that thread, and
+    long-lived pools would keep profiling after stop().
+    """
+
+    def __init__(self, *, nframes: int = 10, snapshot_interval: float = 1.0):
+        self.nframes = nframes
+        self.snapshot_interval = snapshot_interval
+        self._main = cProfile.Profile()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._peak_snapshot: tracemalloc.Snapshot | None = None
+        self._peak_size = 0
+        self.started_at = 0.0
+        self.wall_seconds = 0.0
+        self.stats: pstats.Stats | None = None
+        self.final_snapshot: tracemalloc.Snapshot | None = None
+        self.peak_traced = 0
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+
+    def _sample(self):
+        while not self._stop.wait(self.snapshot_interval):
+            current, _peak = tracemalloc.get_traced_memory()
+            if current > self._peak_size * 1.1:
+                self._peak_size = current
+                self._peak_snapshot = self._take_snapshot()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        tracemalloc.start(self.nframes)
+        self._sampler = threading.Thread(target=self._sample, name="rustore-profiler", daemon=True)
+        self._sampler.start()
+        self._main.enable()
+
+    def stop(self):
+        self._main.disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.wall_seconds = time.perf_counter() - self.started_at
+
+        current, self.peak_traced = tracemalloc.get_traced_memory()
+        self.final_snapshot = self._take_snapshot()
+        if self._peak_snapshot is None or current >= self._peak_size:
+            self._peak_snapshot = self.final_snapshot
+        tracemalloc.stop()
+
+        self.stats = pstats.Stats(self._main, stream=io.StringIO())
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ---------------- analysis ----------------
+    def hot_functions(self) -> list[HotFunction]:
+        out = []
+        for (filename, line, name), (_cc, ncalls, tt, ct, _callers) in self.stats.stats.items():
+            where = name if filename == "~" else f"{_short_path(filename)}:{line} {name}"
+            out.append(HotFunction(classify(filename, name), where, ncalls, tt, ct))
+        return out
+
+    def cpu_by_subsystem(self) -> Dict[str, float]:
+        totals = {s: 0.0 for s in SUBSYSTEMS}
+        for f in self.hot_functions():
+            totals[f.subsystem] += f.self_seconds
+        return totals
+
+    def allocators(self, snapshot: tracemalloc.Snapshot | None = None) -> list[Allocator]:
+        """Allocation sites; each is attributed to the innermost frame that belongs to a known subsystem."""
+        snapshot = snapshot or self._peak_snapshot
+        by_site: Dict[tuple[str, str], list[int]] = {}
+        for stat in snapshot.statistics("traceback"):
+            frames = list(reversed(stat.traceback))  # innermost first
+            subsystem, frame = "other", frames[0]
+            for fr in frames:
+                s = classify(fr.filename)
+                if s != "other":
+                    subsystem, frame = s, fr
+                    break
+            key = (subsystem, f"{_short_path(frame.filename)}:{frame.lineno}")
+            acc = by_site.setdefault(key, [0, 0])
+            acc[0] += stat.size
+            acc[1] += stat.count
+        out = [Allocator(s, where, size, count) for (s, where), (size, count) in by_site.items()]
+        out.sort(key=lambda a: a.size, reverse=True)
+        return out
+
+    def report(self, *, top: int = 25) -> str:
+        lines = [f"=== Profile: {self.wall_seconds:.2f} s wall ==="]
+
+        cpu = self.cpu_by_subsystem()
+        total = sum(cpu.values()) or 1.0
+        lines += ["", "=== Time by subsystem (self time, summed over threads) ==="]
+        for subsystem, seconds in sorted(cpu.items(), key=lambda kv: kv[1], reverse=True):
+            lines.append(f"{subsystem:<10} {seconds:>10.3f} s  {seconds / total:6.1%}")
+
+        funcs = self.hot_functions()
+        lines += ["", f"=== Hot functions by self time (top {top}) ===", "    self s     cum s      calls  subsystem  function"]
+        for f in sorted(funcs, key=lambda f: f.self_seconds, reverse=True)[:top]:
+            lines.append(f"{f.self_seconds:>10.3f} {f.cum_seconds:>9.3f} {f.calls:>10}  {f.subsystem:<9}  {f.where}")
+
+        own = [
+            f for f in funcs
+            if f.where.startswith(("rustore/", "ui/")) and not f.where.startswith("rustore/profiling.py")
+        ]
+        lines += ["", f"=== rustore functions by cumulative time (top {top}) ===", "     cum s    self s      calls  function"]
+        for f in sorted(own, key=lambda f: f.cum_seconds, reverse=True)[:top]:
+            lines.append(f"{f.cum_seconds:>10.3f} {f.self_seconds:>9.3f} {f.calls:>10}  {f.where}")
+
+        allocs = self.allocators()
+        mem = {s: 0 for s in SUBSYSTEMS}
+        for a in allocs:
+            mem[a.subsystem] += a.size
+        lines += ["", f"=== Memory at peak snapshot (tracemalloc peak {_fmt_bytes(self.peak_traced)}) ==="]
+        for subsystem, size in sorted(mem.items(), key=lambda kv: kv[1], reverse=True):
+            lines.append(f"{subsystem:<10} {_fmt_bytes(size):>12}")
+
+        lines += ["", f"=== Biggest allocators (top {top}) ===", "        size     blocks  subsystem  where"]
+        for a in allocs[:top]:
+            lines.append(f"{_fmt_bytes(a.size):>12} {a.count:>10}  {a.subsystem:<9}  {a.where}")
+        return "\n".join(lines) + "\n"
+
+
+def _stats_path(report_path: str) -> str:
+    """report.txt -> report.prof; never the report itself (report.prof -> report.prof.prof)."""
+    path = os.path.splitext(report_path)[0] + ".prof"
+    if os.path.normcase(path) == os.path.normcase(report_path):
+        path = report_path + ".prof"
+    return path
+
+
+@contextmanager
+def profile_run(report_path: str, *, top: int = 25, snapshot_interval: float = 1.0) -> Iterator[Profiler]:
+    """
+    Profiles the block and writes a text report to `report_path` and the raw
+    cProfile data next to it (.prof, for snakeviz / pstats).
+    """
+    prof = Profiler(snapshot_interval=snapshot_interval)
+    prof.start()
+    try:
+        yield prof
+    finally:
+        prof.stop()
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(prof.report(top=top))
+        prof.stats.dump_stats(_stats_path(report_path))
@@ -0,0 +1,63 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+    rate <= 0 disables limiting (acquire returns immediately).
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, *, timeout: float | None = None) -> bool:
+        """Blocks until tokens are available; False if that would take longer than `timeout`."""
+        if self.rate <= 0:
+            return True
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if give_up_at is not None and now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+    def reserve(self, tokens: float = 1.0, *, max_wait: float | None = None) -> float | None:
+        """
+        Takes the tokens now, possibly into debt, and returns how long the caller
+        must wait before using them (for callers that sleep on their own, e.g.
+        asyncio.sleep). None, with nothing taken, if the wait would exceed `max_wait`.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= tokens
+            return wait
@@ -0,0 +1,59 @@
+from email.utils import parsedate_to_datetime
+import logging
+import threading
+import time
+
+
+class ServerClock:
+    """
+    Estimate of (server time - local time) from HTTP `Date` headers.
+
+    A Date header is the server's clock truncated to whole seconds, read at
+    some moment between sending the request and getting the reply, so each
+    response bounds the offset to (D - received_at, D + 1 - sent_at).
+    Bounds from successive responses are intersected, which narrows the
+    estimate well below a second. While the bounds still contain 0 the
+    local clock is taken as correct and the offset is 0; otherwise the
+    middle of the interval is used. Bounds older than `max_age` seconds, or
+    ones that contradict a new response (the local clock was stepped), are
+    dropped.
+    """
+
+    def __init__(self, *, max_age: float = 600.0, logger: logging.Logger | None = None):
+        self.max_age = max_age
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._lo: float | None = None
+        self._hi: float | None = None
+        self._since = 0.0  # time.monotonic() of the oldest sample in the bounds
+        self._offset = 0.0
+
+    def observe(self, date_header: str | None, sent_at: float, received_at: float):
+        """sent_at / received_at: time.time() around the request that returned `date_header`."""
+        if not date_header:
+            return
+        try:
+            server = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return
+        lo, hi = server - received_at, server + 1.0 - sent_at
+        now = time.monotonic()
+        with self._lock:
+            if self._lo is None or now - self._since > self.max_age or lo > self._hi or hi < self._lo:
+                self._lo, self._hi, self._since = lo, hi, now
+            else:
+                self._lo, self._hi = max(self._lo, lo), min(self._hi, hi)
+            previous = self._offset
+            self._offset = 0.0 if self._lo <= 0.0 <= self._hi else (self._lo + self._hi) / 2
+            offset = self._offset
+        if self.logger and abs(offset - previous) >= 1.0:
+            self.logger.warning("[AUTH][CLOCK] расхождение с часами сервера: %+.1f с", offset)
+
+    @property
+    def offset(self) -> float:
+        with self._lock:
+            return self._offset
+
+    def now(self) -> float:
+        """Server time (epoch seconds) as best known."""
+        return time.time() + self.offset
@@ -1,30 +1,87 @@
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterator, Tuple
 import requests
 
 from .api_client import RuStoreApiClient
+from .deadline import Deadline
 from .methods import MethodDef
+from .pagination import PageCursor
+from .validation import MethodValidator
 
 
-class RuStoreService:
-    def __init__(self, client: RuStoreApiClient):
+class ServiceBase:
+    """Validation and client.call arguments shared by RuStoreService and AsyncRuStoreService."""
+
+    def __init__(self, client):
         self.client = client
+        self._validators: Dict[str, MethodValidator] = {}
 
-    def call_method(
+    def validator(self, method: MethodDef) -> MethodValidator:
+        v = self._validators.get(method.key)
+        if v is None:
+            v = MethodValidator(method)
+            self._validators[method.key] = v
+        return v
+
+    def _call_args(
         self,
         method: MethodDef,
         env: str,
-        *,
         path_params: Dict[str, Any],
         query_params: Dict[str, Any],
         body: Dict[str, Any] | None,
-    ) -> Tuple[requests.Response, str]:
+    ) -> Dict[str, Any]:
         path_template = (method.paths or {}).get(env)
         if not path_template:
             raise ValueError(f"Для окружения '{env}' не задан путь в methods.yaml")
+        self.validator(method).validate(env, path_params=path_params, query_params=query_params, body=body)
+        return {
+            "http_method": method.http_method,
+            "path_template": path_template,
+            "path_params": path_params,
+            "query_params": query_params,
+            "body": body,
+            "hedge": self.client.hedger is not None and self.client.hedger.policy.applies(method),
+        }
+
+
+class RuStoreService(ServiceBase):
+    client: RuStoreApiClient
+
+    def call_method(
+        self,
+        method: MethodDef,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        body: Dict[str, Any] | None,
+        deadline: Deadline | None = None,
+    ) -> Tuple[requests.Response, str]:
         return self.client.call(
-            method.http_method,
-            path_template,
-            path_params=path_params,
-            query_params=query_params,
-            body=body,
+            **self._call_args(method, env, path_params, query_params, body), deadline=deadline
         )
+
+    def iter_pages(
+        self,
+        method: MethodDef,
+        env: str,
+        *,
+        path_params: Dict[str, Any],
+        query_params: Dict[str, Any],
+        max_pages: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields parsed JSON pages, following continuationToken / continuation
+        until the API stops returning one. `deadline` covers all pages together.
+        """
+        cursor = PageCursor(method, query_params, max_pages)
+        while True:
+            resp, _url = self.call_method(
+                method, env, path_params=path_params, query_params=cursor.query(), body=None, deadline=deadline
+            )
+            resp.raise_for_status()
+            page = resp.json()
+            yield page
+            if not cursor.advance(page):
+                return
@@ -0,0 +1,344 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable
+import datetime as dt
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from .json_diff import DiffEntry, json_diff
+from .methods import MethodDef
+from .rate_limit import RateLimiter
+
+# Fields that change on every response and must not count as a state change
+VOLATILE_FIELDS = ("timestamp", "requestId", "traceId", "serverTime")
+
+# Fields that tell when the subscription is going to change next
+# (expiry / renewal / next payment), looked up at any depth
+EVENT_TIME_FIELDS = (
+    "expiryTimeMillis",
+    "expiryTime",
+    "expirationDate",
+    "expiresAt",
+    "nextPaymentDate",
+    "nextRenewalDate",
+    "renewalDate",
+    "gracePeriodEndDate",
+    "holdPeriodEndDate",
+)
+
+
+@dataclass
+class WatchTarget:
+    key: str                        # unique id: subscription token / purchase id
+    method: MethodDef
+    env: str
+    path_params: Dict[str, Any]
+    query_params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class StateChange:
+    key: str
+    method_key: str
+    ts: float
+    status_code: int
+    diff: list[DiffEntry]
+    state: Any
+
+
+@dataclass(frozen=True)
+class PollPolicy:
+    """
+    Interval between polls of one subscription.
+    Near an expiry / renewal event it is clamped to min_interval; a stable
+    subscription backs off by `backoff` up to max_interval.
+    """
+    min_interval: float = 30.0
+    base_interval: float = 300.0
+    max_interval: float = 6 * 3600.0
+    backoff: float = 2.0
+    near_event_window: float = 3600.0
+
+    def next_interval(self, prev: float | None, changed: bool, seconds_to_event: float | None) -> float:
+        if prev is None or changed:
+            interval = self.base_interval
+        else:
+            interval = min(self.max_interval, prev * self.backoff)
+
+        if seconds_to_event is not None:
+            if seconds_to_event <= self.near_event_window:
+                interval = self.min_interval
+            else:
+                # never sleep past the event: wake up at the latest halfway to it
+                interval = min(interval, seconds_to_event / 2)
+        return max(self.min_interval, interval)
+
+
+def _parse_event_time(value: Any) -> float | None:
+    if isinstance(value, bool) or value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        # epoch millis vs epoch seconds
+        return float(value) / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        v = value.strip()
+        if v.isdigit():
+            return _parse_event_time(int(v))
+        try:
+            parsed = dt.datetime.fromisoformat(v.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=dt.timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def nearest_event_time(state: Any, *, now: float | None = None) -> float | None:
+    """Earliest upcoming expiry/renewal epoch found anywhere in the response."""
+    now = time.time() if now is None else now
+    names = {n.lower() for n in EVENT_TIME_FIELDS}
+    best: float | None = None
+    stack = [state]
+    while stack:
+        cur = stack.pop()
+        if isinstance(cur, dict):
+            for k, v in cur.items():
+                if str(k).lower() in names:
+                    t = _parse_event_time(v)
+                    if t is not None and t > now and (best is None or t < best):
+                        best = t
+                elif isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(cur, list):
+            stack.extend(cur)
+    return best
+
+
+@dataclass
+class _Watched:
+    target: WatchTarget
+    state: Any = None
+    has_state: bool = False
+    interval: float | None = None
+    errors: int = 0
+
+
+class SubscriptionWatcher:
+    """
+    Polls many subscriptions with adaptive per-subscription intervals,
+    concurrently, under one global request budget, and reports only changes.
+
+    `service` is anything with RuStoreService.call_method signature
+    (RuStoreService or AccountRegistry).
+    """
+
+    def __init__(
+        self,
+        service,
+        on_change: Callable[[StateChange], None],
+        *,
+        policy: PollPolicy | None = None,
+        budget_rps: float = 5.0,
+        max_concurrency: int = 8,
+        ignore_fields: Iterable[str] = VOLATILE_FIELDS,
+        on_error: Callable[[WatchTarget, Exception], None] | None = None,
+        logger: logging.Logger | None = None,
+    ):
+        self.service = service
+        self.on_change = on_change
+        self.on_error = on_error
+        self.policy = policy or PollPolicy()
+        self.budget = RateLimiter(budget_rps)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.ignore_fields = tuple(ignore_fields)
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._watched: Dict[str, _Watched] = {}
+        # (due, seq, key, entry): an entry whose key was removed or re-added is stale
+        self._heap: list[tuple[float, int, str, _Watched]] = []
+        self._seq = itertools.count()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pool: ThreadPoolExecutor | None = None
+
+    # ---------------- targets ----------------
+    def add(self, target: WatchTarget, *, delay: float = 0.0):
+        with self._lock:
+            if target.key in self._watched:
+                self._watched[target.key].target = target
+                return
+            w = self._watched[target.key] = _Watched(target=target)
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), target.key, w))
+        self._wakeup.set()
+
+    def add_many(self, targets: Iterable[WatchTarget]):
+        # spread the first round at the budget rate instead of one burst
+        rate = self.budget.rate if self.budget.rate > 0 else 0
+        for i, t in enumerate(targets):
+            self.add(t, delay=(i / rate) if rate else 0.0)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._watched.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {k: w.state for k, w in self._watched.items() if w.has_state}
+
+    # ---------------- loop ----------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="rustore-watch")
+        self._thread = threading.Thread(target=self._run, name="rustore-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread and wait:
+            self._thread.join()
+        if self._pool:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def _current(self, key: str, w: _Watched) -> bool:
+        # by identity: after remove + add the key has a new _Watched and old entries are dropped
+        return self._watched.get(key) is w
+
+    def _next_due(self) -> tuple[float, str] | None:
+        with self._lock:
+            while self._heap:
+                due, _, key, w = self._heap[0]
+                if not self._current(key, w):
+                    heapq.heappop(self._heap)       # removed target
+                    continue
+                return due, key
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            nxt = self._next_due()
+            now = time.monotonic()
+            if nxt is None or nxt[0] > now:
+                self._wakeup.clear()
+                self._wakeup.wait(timeout=None if nxt is None else nxt[0] - now)
+                continue
+
+            # back-pressure: no more in flight than max_concurrency,
+            # no faster than the global budget
+            self._slots.acquire()
+            with self._lock:
+                entry = heapq.heappop(self._heap)
+                if not self._current(entry[2], entry[3]):
+                    self._slots.release()
+                    continue
+            # a budget token only for a target that is still watched
+            self.budget.acquire()
+            if self._stop.is_set():
+                with self._lock:
+                    heapq.heappush(self._heap, entry)
+                self._slots.release()
+                return
+            self._pool.submit(self._poll, entry[3])
+
+    def _schedule(self, w: _Watched, interval: float):
+        with self._lock:
+            w.interval = interval
+            if self._current(w.target.key, w):
+                heapq.heappush(self._heap, (time.monotonic() + interval, next(self._seq), w.target.key, w))
+        self._wakeup.set()
+
+    def _poll(self, w: _Watched):
+        t = w.target
+        try:
+            try:
+                resp, _url = self.service.call_method(
+                    t.method,
+                    t.env,
+                    path_params=t.path_params,
+                    query_params=t.query_params,
+                    body=None,
+                )
+                if resp.status_code >= 400:
+                    raise RuntimeError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+                state = resp.json()
+            except Exception as e:
+                w.errors += 1
+                if self.logger:
+                    self.logger.warning("[WATCH][ERROR] %s %s: %s", t.key, type(e).__name__, e)
+                if self.on_error:
+                    self._callback(self.on_error, t, e)
+                interval = min(self.policy.max_interval, self.policy.min_interval * (2 ** min(w.errors, 10)))
+                self._schedule(w, interval)
+                return
+
+            w.errors = 0
+            changed = False
+            if w.has_state:
+                diff = json_diff(w.state, state, ignore=self.ignore_fields)
+                changed = bool(diff)
+            else:
+                diff = json_diff(None, state)
+                changed = True
+            w.state = state
+            w.has_state = True
+
+            if changed:
+                self._callback(self.on_change, StateChange(
+                    key=t.key,
+                    method_key=t.method.key,
+                    ts=time.time(),
+                    status_code=resp.status_code,
+                    diff=diff,
+                    state=state,
+                ))
+
+            event = nearest_event_time(state)
+            seconds_to_event = None if event is None else event - time.time()
+            self._schedule(w, self.policy.next_interval(w.interval, changed, seconds_to_event))
+        finally:
+            self._slots.release()
+
+    def _callback(self, fn: Callable, *args):
+        # a failing callback must not skip _schedule: the target would never be polled again
+        try:
+            fn(*args)
+        except Exception as e:
+            if self.logger:
+                name = getattr(fn, "__name__", fn)
+                self.logger.warning("[WATCH][ERROR] обработчик %s: %s: %s", name, type(e).__name__, e)
+
+
+def state_target(method: MethodDef, subscription_token: str, env: str = "prod") -> WatchTarget:
+    """Target for subscription_status: /public/subscription/{subscriptionToken}/state"""
+    return WatchTarget(
+        key=subscription_token,
+        method=method,
+        env=env,
+        path_params={"subscriptionToken": subscription_token},
+    )
+
+
+def v4_target(
+    method: MethodDef,
+    package_name: str,
+    subscription_id: str,
+    purchase_id: str,
+    env: str = "prod",
+) -> WatchTarget:
+    """Target for subscription_data_v4"""
+    return WatchTarget(
+        key=purchase_id,
+        method=method,
+        env=env,
+        path_params={"packageName": package_name, "subscriptionId": subscription_id, "purchaseId": purchase_id},
+    )
@@ -2,33 +2,43 @@ from dataclasses import dataclass
 import time
 import json
 import logging
+import threading
 import requests
 
 from .config import Settings
 from .crypto_sig import iso_timestamp_with_ms_utc, generate_signature_b64
 from .logging_utils import format_response_text
+from .deadline import Deadline, DeadlineExceeded, step_timeout
+from .server_clock import ServerClock
 
 @dataclass
 class Token:
     jwe: str
-    expires_at_epoch: float
+    expires_at: float  # time.monotonic(); immune to local clock steps and skew
+
+class TokenManagerBase:
+    """State and /auth request/response handling shared by the sync and async managers."""
 
-class RuStoreTokenManager:
     def __init__(self, settings: Settings, logger: logging.Logger | None = None):
         self.settings = settings
         self._token: Token | None = None
         self.logger = logger
+        # fed with Date headers by the API clients, used for auth timestamps
+        self.clock = ServerClock(logger=logger)
+        # successful /auth calls, for load tests and metrics
+        self.refreshes = 0
+        self.last_refresh_at: float | None = None
+        self._stats_lock = threading.Lock()
 
     def _valid(self) -> bool:
         if not self._token:
             return False
-        return time.time() < (self._token.expires_at_epoch - self.settings.token_skew_seconds)
-
-    def get_token(self, force_refresh: bool = False) -> str:
-        if (not force_refresh) and self._valid():
-            return self._token.jwe
+        return time.monotonic() < (self._token.expires_at - self.settings.token_skew_seconds)
 
-        ts = iso_timestamp_with_ms_utc()
+    def _auth_request(self) -> tuple[str, dict, float]:
+        """URL, payload and the clock offset the timestamp was signed with."""
+        offset = self.clock.offset
+        ts = iso_timestamp_with_ms_utc(time.time() + offset)
         signature = generate_signature_b64(self.settings.key_id, self.settings.private_key_b64, ts)
 
         url = f"{self.settings.base_url}/public/auth/"
@@ -44,29 +54,97 @@ class RuStoreTokenManager:
                 url,
                 json.dumps(safe_payload, ensure_ascii=False),
             )
+        return url, payload, offset
 
-        try:
-            r = requests.post(url, json=payload, timeout=self.settings.http_timeout_seconds)
-            if self.logger:
-                self.logger.info(
-                    "[AUTH][RESPONSE] %s\nheaders=%s\nbody=%s",
-                    r.status_code,
-                    json.dumps(dict(r.headers), ensure_ascii=False),
-                    format_response_text(r.text),
-                )
-
-            r.raise_for_status()
-            data = r.json()
-        except Exception as e:
-            if self.logger:
-                self.logger.exception("[AUTH][ERROR] %s: %s", type(e).__name__, e)
-            raise
+    def _observe_auth(self, r, sent_at: float, signed_offset: float) -> bool:
+        """
+        Feeds the response's Date into the clock. True if the request was
+        rejected and the offset has since moved by a second or more, i.e. the
+        timestamp was probably skewed and a re-signed request should pass.
+        """
+        self.clock.observe(r.headers.get("Date"), sent_at, time.time())
+        if r.status_code not in (400, 401, 403):
+            return False
+        offset = self.clock.offset
+        if abs(offset - signed_offset) < 1.0:
+            return False
+        if self.logger:
+            self.logger.warning("[AUTH] %s, повтор с поправкой на часы сервера %+.1f с", r.status_code, offset)
+        return True
+
+    def _log_auth_response(self, r):
+        if self.logger:
+            self.logger.info(
+                "[AUTH][RESPONSE] %s\nheaders=%s\nbody=%s",
+                r.status_code,
+                json.dumps(dict(r.headers), ensure_ascii=False),
+                format_response_text(r.text),
+            )
 
+    def _auth_failed(self, e: Exception, deadline: Deadline | None, transport_error: bool):
+        if self.logger:
+            self.logger.exception("[AUTH][ERROR] %s: %s", type(e).__name__, e)
+        if deadline and deadline.expired and transport_error:
+            raise DeadlineExceeded(f"Истёк дедлайн {deadline.seconds:g} с (авторизация)") from e
+
+    def _accept(self, data: dict, sent_mono: float) -> str:
+        """sent_mono: time.monotonic() when /auth was sent, so ttl is never overestimated."""
         body = data.get("body") or {}
         jwe = body.get("jwe")
         ttl = body.get("ttl")
         if not jwe or not ttl:
             raise RuntimeError(f"Неожиданный ответ auth: {data}")
 
-        self._token = Token(jwe=jwe, expires_at_epoch=time.time() + float(ttl))
+        self._token = Token(jwe=jwe, expires_at=sent_mono + float(ttl))
+        with self._stats_lock:
+            self.refreshes += 1
+            self.last_refresh_at = time.time()
         return jwe
+
+class RuStoreTokenManager(TokenManagerBase):
+    def __init__(self, settings: Settings, logger: logging.Logger | None = None):
+        super().__init__(settings, logger)
+        # one /auth at a time: threads that find the token expired wait for it instead of sending their own
+        self._refresh_lock = threading.Lock()
+
+    def get_token(
+        self,
+        force_refresh: bool = False,
+        *,
+        deadline: Deadline | None = None,
+        stale: str | None = None,
+    ) -> str:
+        """
+        stale: the token a 401/403 came back for. A forced refresh is skipped if
+        another thread has already replaced it, so a burst of 401s costs one /auth.
+        """
+        if (not force_refresh) and self._valid():
+            return self._token.jwe
+
+        # without a deadline, wait as long as the refresh in progress (it has its own HTTP timeout)
+        lock_wait = -1 if deadline is None else deadline.timeout(deadline.seconds, "авторизация")
+        if not self._refresh_lock.acquire(timeout=lock_wait):
+            raise DeadlineExceeded(f"Истёк дедлайн {deadline.seconds:g} с (авторизация)")
+        try:
+            if self._valid() and (not force_refresh or (stale is not None and self._token.jwe != stale)):
+                return self._token.jwe
+
+            for attempt in range(2):
+                timeout = step_timeout(deadline, self.settings.http_timeout_seconds, "авторизация")
+                url, payload, signed_offset = self._auth_request()
+
+                try:
+                    sent_at, sent_mono = time.time(), time.monotonic()
+                    r = requests.post(url, json=payload, timeout=timeout)
+                    self._log_auth_response(r)
+                    if self._observe_auth(r, sent_at, signed_offset) and attempt == 0:
+                        continue
+                    r.raise_for_status()
+                    data = r.json()
+                except Exception as e:
+                    self._auth_failed(e, deadline, isinstance(e, requests.RequestException))
+                    raise
+
+                return self._accept(data, sent_mono)
+        finally:
+            self._refresh_lock.release()
@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable
+import re
+
+from .methods import MethodDef
+
+SECTIONS = ("path", "query", "body")
+
+_INT_RE = re.compile(r"^[+-]?\d+$")
+_BOOL_STRINGS = {"1", "0", "true", "false", "yes", "no", "y", "n", "on", "off"}
+
+
+class ValidationError(ValueError):
+    def __init__(self, method_key: str, errors: list[str]):
+        self.method_key = method_key
+        self.errors = errors
+        super().__init__(f"{method_key}: " + "; ".join(errors))
+
+
+def _is_float_str(v: str) -> bool:
+    try:
+        float(v)
+        return True
+    except ValueError:
+        return False
+
+
+def _scalar_checker(type_name: str, lenient: bool) -> Callable[[Any], bool]:
+    """
+    lenient=True: path/query values may come as strings (CLI, .jsonl, UI),
+    they end up in the URL anyway, so "123" is a valid int there.
+    """
+    if type_name == "str":
+        if lenient:
+            return lambda v: isinstance(v, (str, int, float)) and not isinstance(v, bool)
+        return lambda v: isinstance(v, str)
+    if type_name == "int":
+        if lenient:
+            return lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (
+                isinstance(v, str) and bool(_INT_RE.match(v.strip()))
+            )
+        return lambda v: isinstance(v, int) and not isinstance(v, bool)
+    if type_name == "float":
+        if lenient:
+            return lambda v: (isinstance(v, (int, float)) and not isinstance(v, bool)) or (
+                isinstance(v, str) and _is_float_str(v)
+            )
+        return lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)
+    if type_name == "bool":
+        if lenient:
+            return lambda v: isinstance(v, bool) or (isinstance(v, str) and v.strip().lower() in _BOOL_STRINGS)
+        return lambda v: isinstance(v, bool)
+    if type_name in ("dict", "object", "json"):
+        return lambda v: isinstance(v, dict)
+    return lambda v: True
+
+
+def _checker(type_name: str, lenient: bool) -> Callable[[Any], bool]:
+    t = (type_name or "str").strip()
+    if t.startswith("list[") and t.endswith("]"):
+        item_ok = _scalar_checker(t[5:-1].strip(), lenient)
+
+        def check_list(v: Any) -> bool:
+            if lenient and isinstance(v, str):
+                v = [x.strip() for x in v.split(",") if x.strip()]
+            return isinstance(v, (list, tuple)) and all(item_ok(x) for x in v)
+
+        return check_list
+    return _scalar_checker(t, lenient)
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    section: str
+    name: str
+    type_name: str
+    required: bool
+    check: Callable[[Any], bool]
+
+
+def _empty(v: Any) -> bool:
+    return v is None or v == "" or v == []
+
+
+def _type_label(v: Any) -> str:
+    return type(v).__name__
+
+
+class MethodValidator:
+    """
+    Validator compiled once from methods.yaml -> params of a method.
+    Checks required fields, types (incl. list[...] items), unknown path/query
+    params and that every {placeholder} of the env path gets a value.
+    """
+
+    def __init__(self, method: MethodDef):
+        self.method_key = method.key
+        self.rules: Dict[str, list[FieldRule]] = {}
+        self.known: Dict[str, frozenset[str]] = {}
+        for section in SECTIONS:
+            schema = (method.params or {}).get(section) or {}
+            rules = []
+            for name, meta in schema.items():
+                meta = meta or {}
+                t = (meta.get("type") or "str").strip()
+                rules.append(FieldRule(
+                    section=section,
+                    name=name,
+                    type_name=t,
+                    required=bool(meta.get("required", False)),
+                    check=_checker(t, lenient=(section != "body")),
+                ))
+            self.rules[section] = rules
+            self.known[section] = frozenset(schema)
+
+        self.required_path = frozenset(r.name for r in self.rules["path"] if r.required)
+        self.placeholders: Dict[str, frozenset[str]] = {
+            env: frozenset(f for _, f, _, _ in Formatter().parse(tpl) if f)
+            for env, tpl in (method.paths or {}).items()
+        }
+
+    def errors(
+        self,
+        env: str,
+        *,
+        path_params: Dict[str, Any] | None,
+        query_params: Dict[str, Any] | None,
+        body: Dict[str, Any] | None,
+    ) -> list[str]:
+        out: list[str] = []
+        if env not in self.placeholders:
+            out.append(f"для окружения '{env}' не задан путь в methods.yaml")
+
+        if body is not None and not isinstance(body, dict):
+            out.append(f"body: ожидается JSON-объект, получено {_type_label(body)}")
+            body = None
+
+        values = {"path": path_params or {}, "query": query_params or {}, "body": body or {}}
+        for section in SECTIONS:
+            given = values[section]
+            for rule in self.rules[section]:
+                v = given.get(rule.name)
+                if _empty(v):
+                    if rule.required:
+                        out.append(f"{section}.{rule.name}: обязательное поле")
+                    continue
+                if not rule.check(v):
+                    out.append(f"{section}.{rule.name}: ожидается {rule.type_name}, получено {v!r}")
+            if section != "body":
+                for name in given:
+                    if name not in self.known[section]:
+                        out.append(f"{section}.{name}: неизвестный параметр")
+
+        for name in sorted(self.placeholders.get(env, ())):
+            if name not in self.required_path and _empty(values["path"].get(name)):
+                out.append(f"path.{name}: не задан параметр пути")
+        return out
+
+    def validate(
+        self,
+        env: str,
+        *,
+        path_params: Dict[str, Any] | None,
+        query_params: Dict[str, Any] | None,
+        body: Dict[str, Any] | None,
+    ):
+        errs = self.errors(env, path_params=path_params, query_params=query_params, body=body)
+        if errs:
+            raise ValidationError(self.method_key, errs)
+
+
+def compile_validators(methods: Iterable[MethodDef]) -> Dict[str, MethodValidator]:
+    return {m.key: MethodValidator(m) for m in methods}
+
+
+def validate_batch(validators: Dict[str, MethodValidator], jobs: Iterable[Dict[str, Any]]) -> Dict[int, list[str]]:
+    """
+    jobs: dicts {"method", "env", "path", "query", "body"} (jobs .jsonl shape).
+    Returns {job index: errors} only for invalid jobs.
+    """
+    bad: Dict[int, list[str]] = {}
+    for i, j in enumerate(jobs):
+        v = validators.get(j.get("method"))
+        if v is None:
+            bad[i] = [f"метод '{j.get('method')}' не найден в methods.yaml"]
+            continue
+        errs = v.errors(
+            j.get("env", "prod"),
+            path_params=j.get("path"),
+            query_params=j.get("query"),
+            body=j.get("body"),
+        )
+        if errs:
+            bad[i] = errs
+    return bad
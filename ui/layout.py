@@ -8,3 +8,8 @@ DEFAULT_GEOMETRY = "1480x880"
 
 # Body editor default height (in text lines)
 BODY_TEXT_HEIGHT = 8
+
+
+# Parallel API calls from the UI and how often their elapsed time is refreshed
+REQUEST_POOL_SIZE = 4
+RESULT_TICK_MS = 250
@@ -1,5 +1,6 @@
+import datetime as dt
 import json
-import threading
+import time
 import tkinter as tk
 from tkinter import messagebox
 
@@ -7,21 +8,27 @@ import ttkbootstrap as tb
 from tkinter import ttk
 
 from rustore.config import get_settings
-from rustore.token_manager import RuStoreTokenManager
-from rustore.api_client import RuStoreApiClient
+from rustore.accounts import AccountRegistry
 from rustore.methods import load_all, list_methods, MethodDef
+from rustore.history import HistoryEntry, RequestHistory
+from rustore.executor import RequestExecutor, RUNNING, DONE
+from rustore.compare import CompareResult, compare_envs, format_compare, ENVS
+from rustore.circuit_breaker import OPEN
+from rustore.deadline import Deadline
+from rustore.prefetch import Prefetcher, load_prefetch_policy
 
 from ui.widgets import make_scrolled_text_both, make_scrolled_treeview, ScrollFrame
 from ui.clipboard import bind_clipboard_shortcuts, add_context_menu
-from ui.tooltips import Tooltip
-from ui.body_template import build_body_template, parse_typed
+from ui.method_form import MethodForm
+from ui.result_tab import ResultTab
 from ui.logger_adapter import UiLogger
 from ui.layout import (
     LEFT_PANE_MINSIZE,
     PARAMS_PANE_MINSIZE,
     RESPONSE_PANE_MINSIZE,
     DEFAULT_GEOMETRY,
-    BODY_TEXT_HEIGHT,
+    REQUEST_POOL_SIZE,
+    RESULT_TICK_MS,
 )
 
 
@@ -42,24 +49,54 @@ class MainWindow(tb.Window):
         self.methods: list[MethodDef] = list_methods(cfg)
 
         self.method_by_iid: dict[str, MethodDef] = {}
+        self.iid_by_method_key: dict[str, str] = {}
+
+        self.history = RequestHistory()
+        self.history_search_var = tk.StringVar()
+        self.history_by_iid: dict[str, HistoryEntry] = {}
 
         self.env_var = tk.StringVar(value="prod")
         self.pretty_var = tk.BooleanVar(value=True)
+        self.timeout_var = tk.StringVar(value="0")
+
+        self.executor = RequestExecutor(max_workers=REQUEST_POOL_SIZE)
+        self.result_tabs: dict[int, ResultTab] = {}
+        self._open_endpoints = 0
 
-        self.path_entries = {}
-        self.query_entries = {}
+        # forms are built once per method and swapped on selection
+        self._forms: dict[str, MethodForm] = {}
+        self._current_form: MethodForm | None = None
 
-        self._current_method_iid: str | None = None
-        self._body_dirty: bool = False
+        self.method_filter_var = tk.StringVar()
+        self._method_search_index: list[tuple[str, str]] = []
+        self._tree_layout: list[tuple[str, list[str]]] = []
 
         self._build_ui()
 
         ui_logger = UiLogger(self.log)
-        self.tm = RuStoreTokenManager(self.settings, logger=ui_logger)
-        self.client = RuStoreApiClient(self.settings, self.tm, logger=ui_logger)
+        self.accounts = AccountRegistry(self.settings, logger=ui_logger)
+        # related lookups (methods.yaml relations) start in the background after each call
+        prefetch_policy = load_prefetch_policy()
+        self.prefetcher = (
+            Prefetcher(self.accounts, {m.key: m for m in self.methods}, prefetch_policy, logger=ui_logger)
+            if prefetch_policy
+            else None
+        )
 
         self._populate_methods_tree()
         self._on_method_change()
+        self._refresh_history()
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(RESULT_TICK_MS, self._tick)
+
+    def _on_close(self):
+        self.executor.shutdown(wait=False)
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        # history is written from the Tk thread only, so nothing records after this
+        self.history.close()
+        self.destroy()
 
     # ---------------- logging ----------------
     def log(self, msg: str):
@@ -90,9 +127,14 @@ class MainWindow(tb.Window):
         ttk.Label(pane_left, text="Окружение", font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(10, 0))
         env_box = ttk.Combobox(pane_left, textvariable=self.env_var, values=["prod", "sandbox"], state="readonly")
         env_box.pack(fill="x", pady=(6, 10))
-        env_box.bind("<<ComboboxSelected>>", lambda e: self._on_method_change())
+        env_box.bind("<<ComboboxSelected>>", lambda e: self._update_method_header())
 
         ttk.Label(pane_left, text="Методы", font=("Segoe UI", 10, "bold")).pack(anchor="w")
+        filter_entry = ttk.Entry(pane_left, textvariable=self.method_filter_var)
+        filter_entry.pack(fill="x", pady=(6, 0))
+        bind_clipboard_shortcuts(filter_entry)
+        add_context_menu(filter_entry)
+        self.method_filter_var.trace_add("write", lambda *_: self._filter_methods_tree())
         tree_frame, self.methods_tree = make_scrolled_treeview(pane_left)
         tree_frame.pack(fill="both", expand=True, pady=(6, 10))
         self.methods_tree.bind("<<TreeviewSelect>>", lambda e: self._on_tree_select())
@@ -124,19 +166,6 @@ class MainWindow(tb.Window):
         # IMPORTANT: ScrolledFrame add `.container` to pack/grid
         self.params_scroll.container.pack(fill="both", expand=True)
 
-        # BODY (inside params block, but shown only when needed)
-        self.body_label = ttk.Label(self.params_scroll.inner, text="BODY (JSON)", font=("Segoe UI", 10, "bold"))
-        body_frame, self.body_text = make_scrolled_text_both(self.params_scroll.inner, wrap_mode="none")
-        self.body_frame = body_frame
-        self.body_text.configure(height=BODY_TEXT_HEIGHT)
-
-        def on_body_modified(_e=None):
-            self.body_text.edit_modified(False)
-            self._body_dirty = True
-
-        self.body_text.bind("<<Modified>>", on_body_modified, add=True)
-        self.body_text.edit_modified(False)
-
         # call row
         call_row = ttk.Frame(pane_params)
         call_row.pack(fill="x")
@@ -149,6 +178,15 @@ class MainWindow(tb.Window):
             bootstyle="round-toggle",
         ).pack(side="left", padx=14)
 
+        ttk.Button(
+            call_row, text="Сравнить prod / sandbox", bootstyle="info-outline", command=self._compare_clicked
+        ).pack(side="left", padx=(0, 14))
+
+        ttk.Label(call_row, text="Таймаут, с").pack(side="left")
+        ttk.Spinbox(call_row, from_=0, to=3600, increment=5, width=6, textvariable=self.timeout_var).pack(
+            side="left", padx=(6, 0)
+        )
+
         # ========== Pane 3: response ==========
         pane_resp = ttk.Frame(root, padding=(12, 12))
         root.add(pane_resp, weight=4)
@@ -168,12 +206,12 @@ class MainWindow(tb.Window):
 
         ttk.Button(
             resp_toolbar, text="Copy Pretty", bootstyle="secondary-outline",
-            command=lambda: self._copy_text_widget_all(self.pretty_text)
+            command=lambda: self._copy_result_text("pretty")
         ).pack(side="right", padx=6)
 
         ttk.Button(
             resp_toolbar, text="Copy Raw", bootstyle="secondary-outline",
-            command=lambda: self._copy_text_widget_all(self.raw_text)
+            command=lambda: self._copy_result_text("raw")
         ).pack(side="right")
 
         ttk.Button(
@@ -190,22 +228,181 @@ class MainWindow(tb.Window):
         self.resp_tabs = ttk.Notebook(resp_box)
         self.resp_tabs.pack(fill="both", expand=True)
 
-        pretty_frame, self.pretty_text = make_scrolled_text_both(self.resp_tabs, wrap_mode="none")
-        raw_frame, self.raw_text = make_scrolled_text_both(self.resp_tabs, wrap_mode="none")
+        # each call gets its own result tab after the fixed ones
         logs_frame, self.logs_text = make_scrolled_text_both(self.resp_tabs, wrap_mode="none")
 
-        self.resp_tabs.add(pretty_frame, text="Pretty")
-        self.resp_tabs.add(raw_frame, text="Raw")
         self.resp_tabs.add(logs_frame, text="Logs")
+        self.resp_tabs.add(self._build_history_tab(self.resp_tabs), text="History")
+        self.resp_tabs.add(self._build_endpoints_tab(self.resp_tabs), text="Endpoints")
 
         # status bar
         self.status = ttk.Label(self, text="", anchor="w", foreground="#555")
         self.status.pack(fill="x", side="bottom")
 
+    def _build_history_tab(self, parent) -> ttk.Frame:
+        frame = ttk.Frame(parent, padding=(0, 8))
+
+        search_row = ttk.Frame(frame)
+        search_row.pack(fill="x", pady=(0, 8))
+
+        ttk.Label(search_row, text="invoiceId / purchaseId / appUserId / метод:").pack(side="left")
+        search_entry = ttk.Entry(search_row, textvariable=self.history_search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=6)
+        bind_clipboard_shortcuts(search_entry)
+        add_context_menu(search_entry)
+        search_entry.bind("<Return>", lambda e: self._refresh_history())
+
+        ttk.Button(search_row, text="Найти", bootstyle="secondary-outline", command=self._refresh_history).pack(
+            side="left"
+        )
+        ttk.Button(search_row, text="Повторить", bootstyle="primary-outline", command=self._rerun_history).pack(
+            side="left", padx=6
+        )
+
+        columns = ("ts", "method", "env", "status", "latency")
+        self.history_tree = ttk.Treeview(frame, columns=columns, show="headings", height=8)
+        for col, title, width in (
+            ("ts", "Время", 150),
+            ("method", "Метод", 220),
+            ("env", "Env", 70),
+            ("status", "Статус", 70),
+            ("latency", "мс", 70),
+        ):
+            self.history_tree.heading(col, text=title)
+            self.history_tree.column(col, width=width, stretch=(col == "method"))
+        self.history_tree.pack(fill="x")
+        self.history_tree.bind("<<TreeviewSelect>>", lambda e: self._show_history_entry())
+
+        text_frame, self.history_text = make_scrolled_text_both(frame, wrap_mode="none")
+        text_frame.pack(fill="both", expand=True, pady=(8, 0))
+        return frame
+
+    def _build_endpoints_tab(self, parent) -> ttk.Frame:
+        frame = ttk.Frame(parent, padding=(0, 8))
+
+        bar = ttk.Frame(frame)
+        bar.pack(fill="x", pady=(0, 8))
+        ttk.Label(bar, text="Circuit breaker по эндпоинтам: open — вызовы сразу завершаются ошибкой").pack(
+            side="left"
+        )
+        ttk.Button(bar, text="Сбросить", bootstyle="secondary-outline", command=self._reset_breakers).pack(
+            side="right"
+        )
+
+        columns = ("endpoint", "state", "streak", "rate", "calls", "failures", "rejected", "retry")
+        self.endpoints_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        for col, title, width in (
+            ("endpoint", "Эндпоинт", 320),
+            ("state", "Состояние", 90),
+            ("streak", "Ошибок подряд", 100),
+            ("rate", "Доля ошибок", 90),
+            ("calls", "Попыток", 70),
+            ("failures", "Ошибок", 70),
+            ("rejected", "Отклонено", 80),
+            ("retry", "Повтор через, с", 100),
+        ):
+            self.endpoints_tree.heading(col, text=title)
+            self.endpoints_tree.column(col, width=width, stretch=(col == "endpoint"))
+        self.endpoints_tree.pack(fill="both", expand=True)
+        return frame
+
+    # ---------------- endpoints ----------------
+    def _refresh_endpoints(self):
+        stats = self.accounts.breakers.stats()
+        tree = self.endpoints_tree
+        known = set(tree.get_children())
+        for st in stats:
+            values = (
+                st.key,
+                st.state,
+                st.consecutive_failures,
+                f"{st.error_rate:.0%}",
+                st.calls,
+                st.failures,
+                st.rejected,
+                f"{st.retry_after:.0f}" if st.state == OPEN else "",
+            )
+            if st.key in known:
+                tree.item(st.key, values=values)
+            else:
+                tree.insert("", "end", iid=st.key, values=values)
+        return stats
+
+    def _reset_breakers(self):
+        sel = self.endpoints_tree.selection()
+        if sel:
+            for key in sel:
+                self.accounts.breakers.reset(key)
+        else:
+            self.accounts.breakers.reset()
+        self._refresh_endpoints()
+        self._update_status()
+
+    # ---------------- history ----------------
+    def _refresh_history(self):
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_by_iid.clear()
+        for entry in self.history.search(self.history_search_var.get()):
+            iid = str(entry.id)
+            ts = dt.datetime.fromtimestamp(entry.ts).strftime("%Y-%m-%d %H:%M:%S")
+            latency = "" if entry.latency_ms is None else f"{entry.latency_ms:.0f}"
+            status = "ERR" if entry.status is None else str(entry.status)
+            self.history_tree.insert("", "end", iid=iid, values=(ts, entry.method_key, entry.env, status, latency))
+            self.history_by_iid[iid] = entry
+
+    def _selected_history_entry(self) -> HistoryEntry | None:
+        sel = self.history_tree.selection()
+        if not sel:
+            return None
+        return self.history_by_iid.get(sel[0])
+
+    def _show_history_entry(self):
+        entry = self._selected_history_entry()
+        if not entry:
+            return
+        text = self.history.response_text(entry.id)
+        try:
+            text = json.dumps(json.loads(text), ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+        params = json.dumps(entry.params, ensure_ascii=False, indent=2)
+        self.history_text.delete("1.0", tk.END)
+        self.history_text.insert("1.0", f"=== {entry.url or ''} ===\n{params}\n\n=== RESPONSE ===\n{text}")
+
+    def _rerun_history(self):
+        entry = self._selected_history_entry()
+        if not entry:
+            return
+        iid = self.iid_by_method_key.get(entry.method_key)
+        if not iid:
+            messagebox.showerror("Ошибка", f"Метод '{entry.method_key}' не найден в methods.yaml")
+            return
+
+        self.env_var.set(entry.env)
+        # a method hidden by the filter is detached from the tree and can't be selected
+        if self.method_filter_var.get():
+            self.method_filter_var.set("")
+        self.methods_tree.selection_set(iid)
+        self.methods_tree.focus(iid)
+        self.methods_tree.see(iid)
+        self._on_method_change()
+
+        form = self._current_form
+        if form is None:
+            return
+        form.set_values(entry.path_params, entry.query_params)
+        if entry.body is not None:
+            form.set_body(entry.body)
+
+        self._call_clicked()
+
     # ---------------- methods tree ----------------
     def _populate_methods_tree(self):
         self.methods_tree.delete(*self.methods_tree.get_children())
         self.method_by_iid.clear()
+        self.iid_by_method_key.clear()
+        self._method_search_index.clear()
+        self._tree_layout.clear()
 
         grouped: dict[str, list[MethodDef]] = {}
         for m in self.methods:
@@ -217,11 +414,20 @@ class MainWindow(tb.Window):
         for gi, group_title in enumerate(sorted(grouped.keys())):
             group_iid = f"g:{gi}"
             self.methods_tree.insert("", "end", iid=group_iid, text=group_title, open=True)
+            children = []
 
             for mi, m in enumerate(grouped[group_title]):
                 method_iid = f"m:{gi}:{mi}"
                 self.methods_tree.insert(group_iid, "end", iid=method_iid, text=f"{m.title}  ({m.http_method})")
                 self.method_by_iid[method_iid] = m
+                self.iid_by_method_key[m.key] = method_iid
+                children.append(method_iid)
+
+                # search haystack is built once, filtering is a substring scan
+                haystack = " ".join([m.title, m.key, m.group_title, m.http_method, *m.paths.values()]).lower()
+                self._method_search_index.append((method_iid, haystack))
+
+            self._tree_layout.append((group_iid, children))
 
         root_groups = self.methods_tree.get_children("")
         if root_groups:
@@ -231,6 +437,24 @@ class MainWindow(tb.Window):
                 self.methods_tree.selection_set(children[0])
                 self.methods_tree.focus(children[0])
 
+    def _filter_methods_tree(self):
+        terms = self.method_filter_var.get().lower().split()
+        visible = {iid for iid, haystack in self._method_search_index if all(t in haystack for t in terms)}
+
+        # detach everything, then reattach matches in the original order
+        for gi, (group_iid, children) in enumerate(self._tree_layout):
+            shown = [iid for iid in children if iid in visible]
+            for iid in children:
+                self.methods_tree.detach(iid)
+            if not shown:
+                self.methods_tree.detach(group_iid)
+                continue
+            self.methods_tree.move(group_iid, "", gi)
+            for ci, iid in enumerate(shown):
+                self.methods_tree.move(iid, group_iid, ci)
+            if terms:
+                self.methods_tree.item(group_iid, open=True)
+
     def _on_tree_select(self):
         sel = self.methods_tree.selection()
         if not sel:
@@ -250,46 +474,13 @@ class MainWindow(tb.Window):
     # ---------------- actions ----------------
     def _force_refresh_token(self):
         try:
-            self.tm.get_token(force_refresh=True)
+            for ctx in self.accounts.contexts():
+                ctx.tm.get_token(force_refresh=True)
             messagebox.showinfo("OK", "Токен обновлён. См. вкладку Logs.")
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
 
-    def _clear_container(self, frame: ttk.Frame):
-        for w in frame.winfo_children():
-            w.destroy()
-
-    def _render_kv_section(self, parent: ttk.Frame, title: str, schema: dict, store: dict):
-        """
-        Render PATH or QUERY fields into parent as a compact section.
-        Only called when schema is non-empty.
-        """
-        ttk.Label(parent, text=title, font=("Segoe UI", 10, "bold")).grid(
-            row=self._grid_row, column=0, sticky="w", pady=(8, 6), columnspan=2
-        )
-        self._grid_row += 1
-
-        for name, meta in (schema or {}).items():
-            t = (meta.get("type") or "str")
-            req = bool(meta.get("required", False))
-            hint = (meta.get("hint") or "").strip()
-
-            label = f"{name} ({t})" + (" *" if req else "")
-            ttk.Label(parent, text=label).grid(row=self._grid_row, column=0, sticky="w", padx=(0, 10), pady=4)
-
-            e = ttk.Entry(parent)
-            e.grid(row=self._grid_row, column=1, sticky="ew", pady=4)
-            parent.grid_columnconfigure(1, weight=1)
-
-            bind_clipboard_shortcuts(e)
-            add_context_menu(e)
-            if hint:
-                Tooltip(e, hint)
-
-            store[name] = (e, meta)
-            self._grid_row += 1
-
-    def _on_method_change(self):
+    def _update_method_header(self):
         m = self._selected_method()
         if not m:
             return
@@ -302,176 +493,232 @@ class MainWindow(tb.Window):
         self.method_title.config(text=m.title)
         self.method_meta.config(text=f"{m.http_method}  {path}\n{full}")
 
-        # Rebuild params UI compactly
-        self._clear_container(self.params_scroll.inner)
-        self.path_entries.clear()
-        self.query_entries.clear()
-
-        self._grid_row = 0
-
-        path_schema = (m.params.get("path") or {})
-        query_schema = (m.params.get("query") or {})
-        body_schema = (m.params.get("body") or {})
-
-        has_path = bool(path_schema)
-        has_query = bool(query_schema)
-        has_body = bool(body_schema)
-
-        if has_path:
-            self._render_kv_section(self.params_scroll.inner, "PATH", path_schema, self.path_entries)
-
-        if has_query:
-            self._render_kv_section(self.params_scroll.inner, "QUERY", query_schema, self.query_entries)
-
-        # Body section: show only when schema exists
-        if has_body:
-            ttk.Separator(self.params_scroll.inner).grid(row=self._grid_row, column=0, columnspan=2, sticky="ew", pady=(10, 10))
-            self._grid_row += 1
-
-            self.body_label = ttk.Label(self.params_scroll.inner, text="BODY (JSON)", font=("Segoe UI", 10, "bold"))
-            self.body_label.grid(row=self._grid_row, column=0, sticky="w", pady=(0, 6), columnspan=2)
-            self._grid_row += 1
-
-            self.body_frame, self.body_text = make_scrolled_text_both(self.params_scroll.inner, wrap_mode="none")
-            self.body_frame.grid(row=self._grid_row, column=0, columnspan=2, sticky="ew")
-            self.body_text.configure(height=BODY_TEXT_HEIGHT)
-            self.params_scroll.inner.grid_columnconfigure(1, weight=1)
-            self._grid_row += 1
-
-            # Track edits
-            def on_body_modified(_e=None):
-                self.body_text.edit_modified(False)
-                self._body_dirty = True
-
-            self.body_text.bind("<<Modified>>", on_body_modified, add=True)
-            self.body_text.edit_modified(False)
-
-            # Fill template only when switching method
-            sel = self.methods_tree.selection()
-            current_iid = sel[0] if sel else None
-            method_changed = (current_iid != self._current_method_iid)
-            if method_changed:
-                self._current_method_iid = current_iid
-                self._body_dirty = False
-
-            if not self._body_dirty:
-                template = build_body_template(body_schema)
-                self.body_text.delete("1.0", tk.END)
-                self.body_text.insert("1.0", json.dumps(template, ensure_ascii=False, indent=2))
-                self.body_text.edit_modified(False)
-        else:
-            # no body for this method
-            self._current_method_iid = self.methods_tree.selection()[0] if self.methods_tree.selection() else None
-            self._body_dirty = False
-
-        # Compact note for required
-        if has_path or has_query:
-            ttk.Label(self.params_scroll.inner, text="* обязательные", foreground="#666").grid(
-                row=self._grid_row, column=0, sticky="w", pady=(10, 0), columnspan=2
-            )
-            self._grid_row += 1
-
-        # Clear response panes
-        self.pretty_text.delete("1.0", tk.END)
-        self.raw_text.delete("1.0", tk.END)
-        self.status.config(text="")
-
-    def _collect_params(self, store: dict, section_name: str):
-        values = {}
-        missing = []
-        for name, (entry, meta) in store.items():
-            raw = entry.get().strip()
-            t = meta.get("type", "str")
-            req = meta.get("required", False)
-
-            if req and raw == "":
-                missing.append(f"{section_name}.{name}")
-                continue
-            if raw == "":
-                values[name] = None
-                continue
+    def _on_method_change(self):
+        m = self._selected_method()
+        if not m:
+            return
 
-            try:
-                values[name] = parse_typed(raw, t)
-            except Exception as e:
-                raise ValueError(f"{section_name}.{name}: не удалось привести '{raw}' к {t}: {e}") from e
+        self._update_method_header()
 
-        return values, missing
+        form = self._forms.get(m.key)
+        if form is None:
+            form = MethodForm(self.params_scroll.inner, m)
+            self._forms[m.key] = form
+        if form is self._current_form:
+            return
 
-    def _call_clicked(self):
+        if self._current_form is not None:
+            self._current_form.pack_forget()
+        form.pack(fill="both", expand=True)
+        self._current_form = form
+
+    def _read_request(self, envs: tuple[str, ...]):
+        """
+        Collects and validates the current form for every env in `envs`.
+        Returns (method, path_params, query_params, body, account, timeout) or None
+        after showing the error.
+        """
         m = self._selected_method()
         if not m:
-            return
+            return None
 
-        env = self.env_var.get()
-        path_template = (m.paths or {}).get(env)
-        if not path_template:
-            messagebox.showerror("Ошибка", f"Для окружения '{env}' не задан путь в methods.yaml")
-            return
+        for env in envs:
+            if not (m.paths or {}).get(env):
+                messagebox.showerror("Ошибка", f"Для окружения '{env}' не задан путь в methods.yaml")
+                return None
+
+        form = self._current_form
+        if form is None:
+            return None
 
         try:
-            path_params, miss1 = self._collect_params(self.path_entries, "path")
-            query_params, miss2 = self._collect_params(self.query_entries, "query")
+            path_params = form.collect_path()
+            query_params = form.collect_query()
         except Exception as e:
             messagebox.showerror("Ошибка в параметрах", str(e))
-            return
-
-        missing = miss1 + miss2
-        if missing:
-            messagebox.showerror("Не заполнено", "Обязательные поля:\n" + "\n".join(missing))
-            return
+            return None
 
         body = None
         # if body editor exists for this method, read it
-        if hasattr(self, "body_text") and self.body_text.winfo_exists():
-            body_raw = self.body_text.get("1.0", tk.END).strip()
+        if form.body_text is not None:
+            body_raw = form.body_raw()
             if body_raw:
                 try:
                     body = json.loads(body_raw)
                 except Exception as e:
                     messagebox.showerror("BODY JSON некорректен", str(e))
-                    return
+                    return None
 
-        self.status.config(text="Выполняю запрос... (см. Logs)")
-        self.pretty_text.delete("1.0", tk.END)
-        self.raw_text.delete("1.0", tk.END)
+        try:
+            account = self.accounts.route(path_params, query_params)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return None
 
-        def worker():
+        for env in envs:
+            errors = account.service.validator(m).errors(
+                env, path_params=path_params, query_params=query_params, body=body if body else None
+            )
+            if errors:
+                messagebox.showerror("Ошибка в параметрах", "\n".join(errors))
+                return None
+
+        try:
+            timeout = float(self.timeout_var.get() or 0)
+        except ValueError:
+            messagebox.showerror("Ошибка", "Таймаут должен быть числом секунд")
+            return None
+
+        return m, path_params, query_params, (body if body else None), account, timeout
+
+    def _call_clicked(self):
+        env = self.env_var.get()
+        req = self._read_request((env,))
+        if req is None:
+            return
+        m, path_params, query_params, body, account, timeout = req
+
+        call_params = {"path": path_params, "query": query_params, "body": body}
+
+        tab = ResultTab(self.resp_tabs, f"{m.key} [{env}]", on_cancel=self._cancel_result, on_close=self._close_result)
+
+        def do_call(_cancel_event):
+            started = time.perf_counter()
             try:
-                resp, url = self.client.call(
-                    m.http_method,
-                    path_template,
+                # the same limit as the tab's timeout, but it also stops retries / token refresh
+                resp, url = (self.prefetcher or account.service).call_method(
+                    m,
+                    env,
                     path_params=path_params,
                     query_params=query_params,
-                    body=body if body else None,
+                    body=body,
+                    deadline=Deadline.after(timeout),
                 )
-                self.after(0, lambda r=resp, u=url: self._show_response(r, u))
-            except Exception as e:
-                self.after(0, lambda err=e: self._show_error(err))
+            except Exception:
+                latency_ms = (time.perf_counter() - started) * 1000
+                self.after(0, lambda l=latency_ms: self._record_history(m, env, call_params, None, None, l))
+                raise
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.after(0, lambda r=resp, u=url, l=latency_ms: self._record_history(m, env, call_params, r, u, l))
+            return resp, url
+
+        self._submit(tab, do_call, m.key, timeout)
+
+    def _compare_clicked(self):
+        req = self._read_request(ENVS)
+        if req is None:
+            return
+        m, path_params, query_params, body, account, timeout = req
+
+        tab = ResultTab(self.resp_tabs, f"{m.key} [prod / sandbox]", on_cancel=self._cancel_result, on_close=self._close_result)
+
+        def do_compare(_cancel_event):
+            return compare_envs(
+                account.service,
+                m,
+                path_params=path_params,
+                query_params=query_params,
+                body=body,
+                deadline=Deadline.after(timeout),
+            )
 
-        threading.Thread(target=worker, daemon=True).start()
+        self._submit(tab, do_compare, f"{m.key} ⇄", timeout)
 
-    def _show_response(self, resp, url: str):
-        self.status.config(text=f"{resp.status_code}  URL: {url}")
+    def _submit(self, tab: ResultTab, fn, tab_text: str, timeout: float):
+        handle = self.executor.submit(
+            fn,
+            label=tab.title,
+            timeout=timeout,
+            on_done=lambda h: self.after(0, lambda: self._show_result(h)),
+        )
+        tab.request_id = handle.id
+        self.result_tabs[handle.id] = tab
+        self.resp_tabs.add(tab, text=f"#{handle.id} {tab_text}")
+        self.resp_tabs.select(tab)
+        self._update_status()
+
+    # ---------------- results ----------------
+    def _show_result(self, h):
+        tab = self.result_tabs.get(h.id)
+        if tab is not None:
+            if h.status == DONE and isinstance(h.result, CompareResult):
+                tab.show_compare(h.result, format_compare(h.result), h.elapsed)
+            elif h.status == DONE:
+                resp, url = h.result
+                tab.show_response(resp, url, h.elapsed, pretty=self.pretty_var.get())
+            else:
+                tab.show_error(h.error, h.elapsed)
+        self._update_status()
+
+    def _cancel_result(self, tab: ResultTab):
+        if tab.request_id is not None and self.executor.cancel(tab.request_id):
+            h = self.executor.get(tab.request_id)
+            tab.show_error(h.error, h.elapsed, label="Отменён")
+        self._update_status()
+
+    def _close_result(self, tab: ResultTab):
+        if tab.request_id is not None:
+            self.executor.cancel(tab.request_id)
+            self.executor.forget(tab.request_id)
+            self.result_tabs.pop(tab.request_id, None)
+        self.resp_tabs.forget(tab)
+        tab.destroy()
+        self._update_status()
+
+    def _selected_result_tab(self) -> ResultTab | None:
+        current = self.resp_tabs.select()
+        if not current:
+            return None
+        widget = self.nametowidget(current)
+        return widget if isinstance(widget, ResultTab) else None
 
-        text = resp.text or ""
+    def _copy_result_text(self, which: str):
+        tab = self._selected_result_tab()
+        if tab is None:
+            self.status.config(text="Выберите вкладку с результатом запроса")
+            return
+        self._copy_text_widget_all(tab.pretty_text if which == "pretty" else tab.raw_text)
+
+    def _update_status(self):
+        parts = []
+        in_flight = self.executor.in_flight()
+        if in_flight:
+            parts.append(f"Выполняется запросов: {len(in_flight)} (см. Logs)")
+        if self._open_endpoints:
+            parts.append(f"Отключено эндпоинтов: {self._open_endpoints} (см. Endpoints)")
+        self.status.config(text="  |  ".join(parts))
+
+    def _tick(self):
+        timed_out = self.executor.check_timeouts()
+        for h in timed_out:
+            tab = self.result_tabs.get(h.id)
+            if tab is not None:
+                tab.show_error(h.error, h.elapsed, label="Таймаут")
+        in_flight = self.executor.in_flight()
+        for h in in_flight:
+            tab = self.result_tabs.get(h.id)
+            if tab is not None and h.status == RUNNING:
+                tab.set_running(h.elapsed)
+        open_endpoints = sum(1 for st in self._refresh_endpoints() if st.state == OPEN)
+        if timed_out or open_endpoints != self._open_endpoints:
+            self._open_endpoints = open_endpoints
+            self._update_status()
+        self.after(RESULT_TICK_MS, self._tick)
+
+    def _record_history(self, m: MethodDef, env: str, params: dict, resp, url: str | None, latency_ms: float):
         try:
-            parsed = resp.json()
-        except Exception:
-            parsed = None
-
-        headers = json.dumps(dict(resp.headers), ensure_ascii=False, indent=2)
-        header_block = "=== RESPONSE HEADERS ===\n" + headers + "\n\n"
-
-        if self.pretty_var.get() and parsed is not None:
-            pretty_out = json.dumps(parsed, ensure_ascii=False, indent=2)
-        else:
-            pretty_out = text
-
-        self.pretty_text.insert("1.0", header_block + pretty_out)
-        self.raw_text.insert("1.0", header_block + text)
-        self.resp_tabs.select(0)
-
-    def _show_error(self, e: Exception):
-        self.status.config(text="Ошибка запроса (см. Logs)")
-        messagebox.showerror("Ошибка", str(e))
+            self.history.record(
+                m.key,
+                env,
+                path_params=params["path"],
+                query_params=params["query"],
+                body=params["body"],
+                status=resp.status_code if resp is not None else None,
+                latency_ms=latency_ms,
+                url=url,
+                response_text=resp.text if resp is not None else None,
+            )
+        except Exception as e:
+            self.log(f"[HISTORY][ERROR] {type(e).__name__}: {e}")
+            return
+        self._refresh_history()
@@ -0,0 +1,148 @@
+import json
+import tkinter as tk
+from tkinter import ttk
+
+from rustore.methods import MethodDef
+
+from ui.widgets import make_scrolled_text_both
+from ui.clipboard import bind_clipboard_shortcuts, add_context_menu
+from ui.tooltips import Tooltip
+from ui.body_template import build_body_template, parse_typed
+from ui.layout import BODY_TEXT_HEIGHT
+
+
+class MethodForm(ttk.Frame):
+    """
+    Parameter form (PATH / QUERY / BODY) of one method.
+    Built once and kept alive, so switching methods only swaps frames
+    and entered values / body edits survive.
+    """
+
+    def __init__(self, parent, method: MethodDef):
+        super().__init__(parent)
+        self.method = method
+        self.path_entries: dict = {}
+        self.query_entries: dict = {}
+        self.body_text: tk.Text | None = None
+        self.body_dirty: bool = False
+        self._grid_row = 0
+
+        path_schema = (method.params.get("path") or {})
+        query_schema = (method.params.get("query") or {})
+        self.body_schema = (method.params.get("body") or {})
+
+        if path_schema:
+            self._render_kv_section("PATH", path_schema, self.path_entries)
+
+        if query_schema:
+            self._render_kv_section("QUERY", query_schema, self.query_entries)
+
+        # Body section: show only when schema exists
+        if self.body_schema:
+            ttk.Separator(self).grid(row=self._grid_row, column=0, columnspan=2, sticky="ew", pady=(10, 10))
+            self._grid_row += 1
+
+            ttk.Label(self, text="BODY (JSON)", font=("Segoe UI", 10, "bold")).grid(
+                row=self._grid_row, column=0, sticky="w", pady=(0, 6), columnspan=2
+            )
+            self._grid_row += 1
+
+            body_frame, self.body_text = make_scrolled_text_both(self, wrap_mode="none")
+            body_frame.grid(row=self._grid_row, column=0, columnspan=2, sticky="ew")
+            self.body_text.configure(height=BODY_TEXT_HEIGHT)
+            self.grid_columnconfigure(1, weight=1)
+            self._grid_row += 1
+
+            self.reset_body()
+            self.body_text.bind("<<Modified>>", self._on_body_modified, add=True)
+
+        # Compact note for required
+        if path_schema or query_schema:
+            ttk.Label(self, text="* обязательные", foreground="#666").grid(
+                row=self._grid_row, column=0, sticky="w", pady=(10, 0), columnspan=2
+            )
+            self._grid_row += 1
+
+    def _render_kv_section(self, title: str, schema: dict, store: dict):
+        ttk.Label(self, text=title, font=("Segoe UI", 10, "bold")).grid(
+            row=self._grid_row, column=0, sticky="w", pady=(8, 6), columnspan=2
+        )
+        self._grid_row += 1
+
+        for name, meta in (schema or {}).items():
+            t = (meta.get("type") or "str")
+            req = bool(meta.get("required", False))
+            hint = (meta.get("hint") or "").strip()
+
+            label = f"{name} ({t})" + (" *" if req else "")
+            ttk.Label(self, text=label).grid(row=self._grid_row, column=0, sticky="w", padx=(0, 10), pady=4)
+
+            e = ttk.Entry(self)
+            e.grid(row=self._grid_row, column=1, sticky="ew", pady=4)
+            self.grid_columnconfigure(1, weight=1)
+
+            bind_clipboard_shortcuts(e)
+            add_context_menu(e)
+            if hint:
+                Tooltip(e, hint)
+
+            store[name] = (e, meta)
+            self._grid_row += 1
+
+    def _on_body_modified(self, _e=None):
+        self.body_text.edit_modified(False)
+        self.body_dirty = True
+
+    def reset_body(self):
+        if self.body_text is None:
+            return
+        template = build_body_template(self.body_schema)
+        self.body_text.delete("1.0", tk.END)
+        self.body_text.insert("1.0", json.dumps(template, ensure_ascii=False, indent=2))
+        self.body_text.edit_modified(False)
+        self.body_dirty = False
+
+    def set_body(self, body: dict):
+        if self.body_text is None:
+            return
+        self.body_text.delete("1.0", tk.END)
+        self.body_text.insert("1.0", json.dumps(body, ensure_ascii=False, indent=2))
+        self.body_dirty = True
+
+    def set_values(self, path_params: dict, query_params: dict):
+        for store, values in ((self.path_entries, path_params), (self.query_entries, query_params)):
+            for name, (e, _meta) in store.items():
+                v = (values or {}).get(name)
+                e.delete(0, tk.END)
+                if v is None:
+                    continue
+                e.insert(0, ",".join(map(str, v)) if isinstance(v, list) else str(v))
+
+    @staticmethod
+    def _collect(store: dict, section_name: str) -> dict:
+        values = {}
+        for name, (entry, meta) in store.items():
+            raw = entry.get().strip()
+            t = meta.get("type", "str")
+
+            if raw == "":
+                values[name] = None
+                continue
+
+            try:
+                values[name] = parse_typed(raw, t)
+            except Exception as e:
+                raise ValueError(f"{section_name}.{name}: не удалось привести '{raw}' к {t}: {e}") from e
+
+        return values
+
+    def collect_path(self) -> dict:
+        return self._collect(self.path_entries, "path")
+
+    def collect_query(self) -> dict:
+        return self._collect(self.query_entries, "query")
+
+    def body_raw(self) -> str:
+        if self.body_text is None:
+            return ""
+        return self.body_text.get("1.0", tk.END).strip()
@@ -0,0 +1,74 @@
+import json
+import tkinter as tk
+from tkinter import ttk
+
+from ui.widgets import make_scrolled_text_both
+
+
+class ResultTab(ttk.Frame):
+    """
+    One request = one tab: status line with elapsed time, Cancel / Close,
+    and its own Pretty / Raw panes, so parallel calls never overwrite each other.
+    """
+
+    def __init__(self, parent, title: str, *, on_cancel, on_close):
+        super().__init__(parent, padding=(0, 8))
+        self.title = title
+        self.request_id: int | None = None
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", pady=(0, 6))
+
+        self.status_label = ttk.Label(bar, text="В очереди...", anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True)
+
+        ttk.Button(bar, text="Закрыть", bootstyle="secondary-outline", command=lambda: on_close(self)).pack(
+            side="right"
+        )
+        self.cancel_btn = ttk.Button(bar, text="Отменить", bootstyle="danger-outline", command=lambda: on_cancel(self))
+        self.cancel_btn.pack(side="right", padx=6)
+
+        self.tabs = ttk.Notebook(self)
+        self.tabs.pack(fill="both", expand=True)
+        pretty_frame, self.pretty_text = make_scrolled_text_both(self.tabs, wrap_mode="none")
+        raw_frame, self.raw_text = make_scrolled_text_both(self.tabs, wrap_mode="none")
+        self.tabs.add(pretty_frame, text="Pretty")
+        self.tabs.add(raw_frame, text="Raw")
+
+    def set_running(self, elapsed: float):
+        self.status_label.config(text=f"Выполняется... {elapsed:.1f} с")
+
+    def _finish(self, text: str):
+        self.status_label.config(text=text)
+        self.cancel_btn.state(["disabled"])
+
+    def show_response(self, resp, url: str, elapsed: float, *, pretty: bool):
+        self._finish(f"{resp.status_code}  {elapsed:.2f} с  URL: {url}")
+
+        text = resp.text or ""
+        try:
+            parsed = resp.json()
+        except Exception:
+            parsed = None
+
+        headers = json.dumps(dict(resp.headers), ensure_ascii=False, indent=2)
+        header_block = "=== RESPONSE HEADERS ===\n" + headers + "\n\n"
+
+        if pretty and parsed is not None:
+            pretty_out = json.dumps(parsed, ensure_ascii=False, indent=2)
+        else:
+            pretty_out = text
+
+        self.pretty_text.insert("1.0", header_block + pretty_out)
+        self.raw_text.insert("1.0", header_block + text)
+
+    def show_compare(self, result, summary: str, elapsed: float):
+        self._finish(f"{'Совпадает' if result.equal else 'Различается'}  {elapsed:.2f} с")
+        bodies = {env: r.body if r.error is None else r.error for env, r in result.results.items()}
+        self.pretty_text.insert("1.0", summary)
+        self.raw_text.insert("1.0", json.dumps(bodies, ensure_ascii=False, indent=2))
+
+    def show_error(self, e: BaseException, elapsed: float, *, label: str = "Ошибка"):
+        self._finish(f"{label}  {elapsed:.2f} с: {e}")
+        self.pretty_text.insert("1.0", f"{type(e).__name__}: {e}")
+        self.raw_text.insert("1.0", f"{type(e).__name__}: {e}")